@@ -0,0 +1,296 @@
+"""
+Part 3: Data Analytics
+Computes the Part 3 reports from the synced BLS and population data with
+pandas/NumPy, so they run in a single Lambda or locally instead of on a
+Glue/Spark cluster. On Lambda, attach the AWS SDK for pandas layer.
+"""
+
+import io
+import json
+import os
+
+from botocore.exceptions import ClientError
+import numpy as np
+import pandas as pd
+
+from connections import LazyConnection, get_s3_client
+from population_stats import NATION_GEOGRAPHY, loads_population_data, range_statistics, yearly_stats_from_json
+
+# Configuration
+S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'yemi-data-quest')
+BLS_KEY = os.environ.get('BLS_KEY', 'bls/pr/pub/time.series/pr/pr.data.0.Current')
+POPULATION_KEY = os.environ.get('POPULATION_KEY', 'part2/population_data.json')
+# Maintained by datausa_sync.py whenever the population data changes (see population_stats.py)
+POPULATION_STATS_KEY = os.environ.get('POPULATION_STATS_KEY', 'part2/population_stats.json')
+# Maintained by bls_sync.py from each sync's row changes (see bls_aggregates.py)
+BEST_YEAR_AGGREGATE_KEY = os.environ.get('BEST_YEAR_AGGREGATE_KEY', 'bls/pr/_aggregates/best_year_per_series.json')
+
+# Report parameters from the Part 3 specification
+POPULATION_START_YEAR = 2013
+POPULATION_END_YEAR = 2018
+TARGET_SERIES_ID = 'PRS30006032'
+TARGET_PERIOD = 'Q01'
+
+# Shared across warm invocations, so reports reuse its open connections
+shared_s3_client = LazyConnection(get_s3_client)
+
+
+def read_s3_object(bucket, key, s3_client=None):
+    """
+    Read an S3 object into memory.
+
+    Args:
+        bucket (str): S3 bucket name
+        key (str): S3 object key
+        s3_client: Optional Boto3 S3 client (default: the shared client)
+
+    Returns:
+        bytes: Object content
+    """
+    s3_client = s3_client or shared_s3_client
+    return s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+
+
+def load_bls_data(source):
+    """
+    Load a BLS time-series file (tab-separated) into a DataFrame.
+
+    Args:
+        source: File path, file-like object or raw bytes
+
+    Returns:
+        pd.DataFrame: Raw BLS records with trimmed column names
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    df = pd.read_csv(source, sep='\t', dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def clean_bls_data(bls_df):
+    """
+    Trim strings, cast types and drop incomplete rows.
+
+    Args:
+        bls_df (pd.DataFrame): Raw BLS records
+
+    Returns:
+        pd.DataFrame: series_id, year (int), period and value (float) columns
+    """
+    df = pd.DataFrame({
+        'series_id': bls_df['series_id'].str.strip(),
+        'year': pd.to_numeric(bls_df['year'].str.strip(), errors='coerce'),
+        'period': bls_df['period'].str.strip(),
+        'value': pd.to_numeric(bls_df['value'].str.strip(), errors='coerce'),
+    })
+    df = df.replace({'series_id': {'': np.nan}, 'period': {'': np.nan}}).dropna()
+    df['year'] = df['year'].astype(np.int64)
+    print(f"INFO: Cleaned BLS data: {len(df)} of {len(bls_df)} rows kept")
+    return df.reset_index(drop=True)
+
+
+def load_population_data(data):
+    """
+    Normalize population JSON into a Year/Population DataFrame.
+    Accepts record lists ({'Year': ..., 'Population': ...}) as returned by
+    the DataUSA API, and the headers/data layout written by datausa_sync.py
+    (population column B01001_001E, year column 'year'). Only nation-level
+    rows are kept when the data carries a 'geography' column.
+
+    Args:
+        data: Parsed JSON (dict or list)
+
+    Returns:
+        pd.DataFrame: Year (int) and Population (int) columns, one row per record
+    """
+    records = data.get('data', []) if isinstance(data, dict) else data
+    if isinstance(data, dict) and 'headers' in data:
+        df = pd.DataFrame(records, columns=data['headers'])
+    else:
+        df = pd.DataFrame(records)
+
+    if 'geography' in df.columns:
+        df = df[df['geography'] == NATION_GEOGRAPHY]
+    df = df.rename(columns={'year': 'Year', 'B01001_001E': 'Population'})
+    if 'Year' not in df.columns or 'Population' not in df.columns:
+        print("WARNING: Population data has no Year/Population columns")
+        return pd.DataFrame({'Year': pd.Series(dtype=np.int64), 'Population': pd.Series(dtype=np.int64)})
+
+    df = pd.DataFrame({
+        'Year': pd.to_numeric(df['Year'], errors='coerce'),
+        'Population': pd.to_numeric(df['Population'], errors='coerce'),
+    }).dropna()
+    return df.astype(np.int64).sort_values('Year').reset_index(drop=True)
+
+
+def compute_population_statistics(pop_df, start_year=POPULATION_START_YEAR, end_year=POPULATION_END_YEAR):
+    """
+    Mean and standard deviation of the population between two years (inclusive).
+    The standard deviation is the sample estimate, matching Spark's stddev.
+
+    Returns:
+        dict: mean, std, min, max and count
+    """
+    population = pop_df.loc[pop_df['Year'].between(start_year, end_year), 'Population'].to_numpy(dtype=np.float64)
+    if population.size == 0:
+        return {'mean': None, 'std': None, 'min': None, 'max': None, 'count': 0}
+    return {
+        'mean': float(population.mean()),
+        'std': float(population.std(ddof=1)) if population.size > 1 else None,
+        'min': float(population.min()),
+        'max': float(population.max()),
+        'count': int(population.size),
+    }
+
+
+def compute_yearly_sums(bls_df):
+    """
+    Sum value per series_id and year.
+
+    Returns:
+        pd.DataFrame: series_id, year and total_value, sorted by series_id and year
+    """
+    return (
+        bls_df.groupby(['series_id', 'year'], sort=True)['value']
+        .sum()
+        .reset_index(name='total_value')
+    )
+
+
+def get_best_year_per_series(yearly_sums):
+    """
+    For each series_id, the year with the largest total_value.
+    Ties go to the earliest year.
+
+    Returns:
+        pd.DataFrame: series_id, year and total_value, sorted by series_id
+    """
+    best_rows = yearly_sums.groupby('series_id', sort=True)['total_value'].idxmax()
+    return yearly_sums.loc[best_rows.to_numpy()].reset_index(drop=True)
+
+
+def get_series_with_population(bls_df, pop_df, target_series_id=TARGET_SERIES_ID, target_period=TARGET_PERIOD):
+    """
+    Values of one series/period joined with the population of the same year.
+
+    Returns:
+        pd.DataFrame: series_id, year, period, value and Population (NaN when unknown)
+    """
+    filtered = bls_df.loc[
+        (bls_df['series_id'] == target_series_id) & (bls_df['period'] == target_period),
+        ['series_id', 'year', 'period', 'value']
+    ]
+    result = filtered.merge(
+        pop_df.rename(columns={'Year': 'year'}), on='year', how='left'
+    )
+    return result.sort_values('year').reset_index(drop=True)
+
+
+def load_best_year_aggregate(bucket, s3_client=None):
+    """
+    Read the precomputed best-year report maintained by the BLS sync.
+
+    Returns:
+        list: [{'series_id', 'year', 'total_value'}], or None if it does not exist yet
+    """
+    try:
+        return json.loads(read_s3_object(bucket, BEST_YEAR_AGGREGATE_KEY, s3_client))['best_years']
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def load_population_statistics(bucket, start_year=POPULATION_START_YEAR, end_year=POPULATION_END_YEAR, s3_client=None):
+    """
+    Year-range population statistics from the per-year partials stored by
+    datausa_sync.py, without reading the population data itself.
+
+    Returns:
+        dict: mean, std, min, max and count, or None if no partials are stored
+    """
+    try:
+        stored = json.loads(read_s3_object(bucket, POPULATION_STATS_KEY, s3_client))
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return range_statistics(yearly_stats_from_json(stored['years']), start_year, end_year)
+
+
+def run_reports(bls_df, pop_df, best_years=None, population_statistics=None):
+    """
+    Produce all Part 3 reports from cleaned BLS data and population data.
+    Precomputed results (see load_best_year_aggregate and
+    load_population_statistics) are used as-is when given.
+
+    Returns:
+        dict: population_statistics, best_year_per_series and series_with_population
+    """
+    if best_years is None:
+        best_years = get_best_year_per_series(compute_yearly_sums(bls_df)).to_dict(orient='records')
+    series_with_population = get_series_with_population(bls_df, pop_df)
+    if population_statistics is None:
+        population_statistics = compute_population_statistics(pop_df)
+    return {
+        'population_statistics': population_statistics,
+        'best_year_per_series': best_years,
+        'series_with_population': json.loads(series_with_population.to_json(orient='records')),
+    }
+
+
+def lambda_handler(event, context):
+    """
+    AWS Lambda handler function.
+    Loads the synced BLS and population data from S3 and runs the reports.
+
+    Returns:
+        dict: Lambda response with statusCode and body
+    """
+    try:
+        bls_df = clean_bls_data(load_bls_data(read_s3_object(S3_BUCKET_NAME, BLS_KEY, shared_s3_client)))
+        pop_df = load_population_data(loads_population_data(read_s3_object(S3_BUCKET_NAME, POPULATION_KEY, shared_s3_client)))
+
+        reports = run_reports(
+            bls_df, pop_df,
+            best_years=load_best_year_aggregate(S3_BUCKET_NAME, shared_s3_client),
+            population_statistics=load_population_statistics(S3_BUCKET_NAME, s3_client=shared_s3_client)
+        )
+        print(f"INFO: Population statistics: {json.dumps(reports['population_statistics'])}")
+        print(f"INFO: Best year computed for {len(reports['best_year_per_series'])} series")
+        print(f"INFO: {TARGET_SERIES_ID}/{TARGET_PERIOD}: {json.dumps(reports['series_with_population'])}")
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Analytics completed successfully',
+                'population_statistics': reports['population_statistics'],
+                'series_count': len(reports['best_year_per_series']),
+                'series_with_population': reports['series_with_population']
+            })
+        }
+
+    except Exception as e:
+        print(f"ERROR: Analytics failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Analytics failed',
+                'message': str(e)
+            })
+        }
+
+
+# For local testing: python analytics.py pr.data.0.Current population_data.json
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python analytics.py BLS_FILE POPULATION_JSON")
+        sys.exit(1)
+
+    bls_df = clean_bls_data(load_bls_data(sys.argv[1]))
+    with open(sys.argv[2], 'rb') as population_file:
+        pop_df = load_population_data(loads_population_data(population_file.read()))
+    print(json.dumps(run_reports(bls_df, pop_df), indent=2, default=str)[:5000])
@@ -0,0 +1,93 @@
+"""
+Cold-start import-time report for the Lambda entry points
+
+Imports each handler module in a fresh interpreter with `-X importtime`
+and reports its total init time and the heaviest imports it pulls in.
+Exits with status 1 when a module exceeds the budget.
+
+Usage (from the repository root):
+    python benchmarks/import_time.py [--budget-ms 300] [--top 10] [MODULE ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ['lambda_function', 'bls_sync', 'datausa_sync']
+# What the first sync does once init is over; reported separately, not budgeted
+FIRST_USE = (
+    "from connections import get_s3_client, get_session; "
+    "get_s3_client(); get_session('benchmark'); import bs4"
+)
+
+
+def measure_imports(code):
+    """
+    Run `code` in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: (module, self_us, cumulative_us) for every import, in load order
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+        env=dict(os.environ, AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def report(module, top):
+    """Print the import report for one module; returns its init time in ms"""
+    imports = measure_imports(f"import {module}")
+    # A module's own imports are the more deeply indented lines right above it;
+    # anything earlier was loaded by interpreter startup (site, .pth files)
+    end = max(index for index, entry in enumerate(imports) if entry[0].strip() == module)
+    depth = len(imports[end][0]) - len(imports[end][0].lstrip())
+    start = end
+    while start > 0 and len(imports[start - 1][0]) - len(imports[start - 1][0].lstrip()) > depth:
+        start -= 1
+    subtree = imports[start:end]
+    total_ms = imports[end][2] / 1000
+    print(f"{module}: {total_ms:.1f} ms import time, {len(subtree) + 1} modules loaded")
+    heaviest = sorted(subtree, key=lambda entry: -entry[2])
+    for name, self_us, cumulative_us in heaviest[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name.strip()}")
+    return total_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--budget-ms', type=float, default=300.0)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        total_ms = report(module, args.top)
+        if total_ms > args.budget_ms:
+            over_budget.append(module)
+        print()
+
+    first_use = measure_imports(FIRST_USE)
+    print(f"First use (S3 client, HTTP session, bs4): {sum(self_us for _, self_us, _ in first_use) / 1000:.1f} ms of imports")
+
+    if over_budget:
+        print(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"All modules within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Offline stand-ins for the sync's remote services
+
+SourceServer serves a synthetic BLS directory (IIS-style listing plus files,
+with ETag/Last-Modified validators and 304s) and Census API tables from a
+local HTTP server. S3Stub is an in-process, thread-safe bucket implementing
+the S3 calls the sync Lambdas make. Both count requests and bytes moved.
+"""
+
+import datetime
+import email.utils
+import hashlib
+import io
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from botocore.exceptions import ClientError
+
+BLS_PATH = '/pub/time.series/pr/'
+SERIES_HEADER = 'series_id        \tyear\tperiod\tvalue\tfootnote_codes\n'
+
+
+def make_series_file(index, rows, revision=0):
+    """
+    A pr.data.* style file with `rows` observations.
+    Rows whose position is a multiple of 97 carry `revision` in their value,
+    so bumping it changes about 1% of the rows.
+    """
+    lines = [SERIES_HEADER]
+    for row in range(rows):
+        series, rest = divmod(row, 40)
+        year, quarter = divmod(rest, 4)
+        value = (series * 7 + year * 3 + quarter) % 1000 / 10
+        if row % 97 == 0:
+            value += revision
+        lines.append(f"PRS{index:03d}{series:05d}  \t{2000 + year}\tQ0{quarter + 1}\t{value:12.3f}\t\n")
+    return ''.join(lines).encode('utf-8')
+
+
+class SourceServer:
+    """Local HTTP server playing download.bls.gov and api.census.gov"""
+
+    def __init__(self):
+        self.files = {}  # name -> (content, modified datetime)
+        self.census = {}  # (vintage, geography) -> table
+        self.counters = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, as the real hosts
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                server.count('connections')
+
+            def do_GET(self):
+                server.handle_get(self)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    @property
+    def bls_url(self):
+        return f"{self.base_url}{BLS_PATH}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset_counters(self):
+        with self._lock:
+            self.counters = {}
+
+    def _send(self, handler, status, body=b'', headers=None):
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if body:
+            handler.wfile.write(body)
+        self.count('requests')
+        self.count(f"status_{status}")
+        self.count('bytes_sent', len(body))
+
+    def listing(self):
+        rows = []
+        for name, (content, modified) in sorted(self.files.items()):
+            stamp = f"{modified.month}/{modified.day}/{modified.year} {modified.strftime('%I:%M %p').lstrip('0'):>8}"
+            rows.append(f'{stamp} {len(content):12d} <A HREF="{BLS_PATH}{name}">{name}</A><br>')
+        return (
+            '<html><head><title>download.bls.gov - /pub/time.series/pr/</title></head><body>'
+            '<H1>download.bls.gov - /pub/time.series/pr/</H1><hr><pre>'
+            '<A HREF="/pub/time.series/">[To Parent Directory]</A><br><br>'
+            + ''.join(rows) + '</pre><hr></body></html>'
+        ).encode('utf-8')
+
+    def handle_get(self, handler):
+        url = urlparse(handler.path)
+        if url.path == BLS_PATH:
+            return self._send(handler, 200, self.listing(), {'Content-Type': 'text/html'})
+        if url.path.startswith(BLS_PATH):
+            name = url.path[len(BLS_PATH):]
+            if name not in self.files:
+                return self._send(handler, 404)
+            content, modified = self.files[name]
+            validators = {
+                'ETag': f'"{hashlib.md5(content).hexdigest()[:16]}"',
+                'Last-Modified': email.utils.format_datetime(modified.replace(tzinfo=datetime.timezone.utc), usegmt=True)
+            }
+            if handler.headers.get('If-None-Match') == validators['ETag']:
+                return self._send(handler, 304, headers=validators)
+            return self._send(handler, 200, content, validators)
+        if url.path.startswith('/data/'):
+            vintage = int(url.path.split('/')[2])
+            geography = parse_qs(url.query).get('for', [''])[0]
+            table = self.census.get((vintage, geography))
+            if table is None:
+                return self._send(handler, 404)
+            return self._send(handler, 200, json.dumps(table).encode('utf-8'), {'Content-Type': 'application/json'})
+        return self._send(handler, 404)
+
+
+class _Body(io.BytesIO):
+    """StreamingBody stand-in"""
+
+    def iter_lines(self):
+        for line in self.read().splitlines():
+            yield line
+
+
+class S3Stub:
+    """In-process bucket with the subset of the S3 API the sync uses"""
+
+    def __init__(self):
+        self.objects = {}  # key -> {'body', 'etag', 'last_modified', 'metadata'}
+        self.counters = {}
+        self._uploads = {}
+        self._upload_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset_counters(self):
+        with self._lock:
+            self.counters = {}
+
+    def _missing(self, operation):
+        code = '404' if operation == 'HeadObject' else 'NoSuchKey'
+        return ClientError({'Error': {'Code': code, 'Message': 'Not Found'}}, operation)
+
+    def _store(self, key, body, metadata, etag=None):
+        with self._lock:
+            self.objects[key] = {
+                'body': body,
+                'etag': etag or hashlib.md5(body).hexdigest(),
+                'last_modified': datetime.datetime.now(datetime.timezone.utc),
+                'metadata': dict(metadata or {})
+            }
+            return self.objects[key]
+
+    def _get(self, key, operation):
+        with self._lock:
+            if key not in self.objects:
+                raise self._missing(operation)
+            return self.objects[key]
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self.count('head_object')
+        obj = self._get(Key, 'HeadObject')
+        return {'ETag': f'"{obj["etag"]}"', 'LastModified': obj['last_modified'],
+                'ContentLength': len(obj['body']), 'Metadata': obj['metadata']}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self.count('get_object')
+        obj = self._get(Key, 'GetObject')
+        self.count('bytes_out', len(obj['body']))
+        return {'Body': _Body(obj['body']), 'ETag': f'"{obj["etag"]}"', 'LastModified': obj['last_modified'],
+                'ContentLength': len(obj['body']), 'Metadata': obj['metadata']}
+
+    def put_object(self, Bucket, Key, Body, Metadata=None, **kwargs):
+        self.count('put_object')
+        body = Body.read() if hasattr(Body, 'read') else Body
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.count('bytes_in', len(body))
+        return {'ETag': f'"{self._store(Key, body, Metadata)["etag"]}"'}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, **kwargs):
+        with open(Filename, 'rb') as source:
+            return self.put_object(Bucket, Key, source.read(), **(ExtraArgs or {}))
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        with open(Filename, 'wb') as target:
+            target.write(self.get_object(Bucket, Key)['Body'].read())
+
+    def copy_object(self, Bucket, Key, CopySource, **kwargs):
+        self.count('copy_object')
+        source = self._get(CopySource['Key'], 'CopyObject')
+        self._store(Key, source['body'], source['metadata'], source['etag'])
+        return {}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self.count('delete_object')
+        with self._lock:
+            self.objects.pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self.count('delete_objects')
+        with self._lock:
+            for obj in Delete['Objects']:
+                self.objects.pop(obj['Key'], None)
+        return {'Deleted': [{'Key': obj['Key']} for obj in Delete['Objects']]}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self.count('list_objects_v2')
+        with self._lock:
+            keys = sorted(key for key in self.objects if key.startswith(Prefix))
+            start = int(ContinuationToken or 0)
+            page = keys[start:start + MaxKeys]
+            response = {'KeyCount': len(page), 'IsTruncated': start + MaxKeys < len(keys)}
+            if page:
+                response['Contents'] = [
+                    {'Key': key, 'ETag': f'"{self.objects[key]["etag"]}"', 'Size': len(self.objects[key]['body']),
+                     'LastModified': self.objects[key]['last_modified']}
+                    for key in page
+                ]
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = str(start + MaxKeys)
+        return response
+
+    def get_paginator(self, operation):
+        stub = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                token = None
+                while True:
+                    page = stub.list_objects_v2(ContinuationToken=token, **kwargs)
+                    yield page
+                    if not page['IsTruncated']:
+                        return
+                    token = page['NextContinuationToken']
+
+        return Paginator()
+
+    def create_multipart_upload(self, Bucket, Key, Metadata=None, **kwargs):
+        self.count('create_multipart_upload')
+        with self._lock:
+            upload_id = str(next(self._upload_ids))
+            self._uploads[upload_id] = {'parts': {}, 'metadata': Metadata}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self.count('upload_part')
+        body = Body.read() if hasattr(Body, 'read') else Body
+        self.count('bytes_in', len(body))
+        with self._lock:
+            self._uploads[UploadId]['parts'][PartNumber] = body
+        return {'ETag': f'"{hashlib.md5(body).hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self.count('complete_multipart_upload')
+        with self._lock:
+            upload = self._uploads.pop(UploadId)
+        body = b''.join(upload['parts'][part['PartNumber']] for part in MultipartUpload['Parts'])
+        etag = f"{hashlib.md5(body).hexdigest()}-{len(upload['parts'])}"
+        return {'ETag': f'"{self._store(Key, body, upload["metadata"], etag)["etag"]}"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self.count('abort_multipart_upload')
+        with self._lock:
+            self._uploads.pop(UploadId, None)
+        return {}
@@ -0,0 +1,195 @@
+"""
+Offline end-to-end benchmark of the sync Lambdas
+
+Runs sync_bls_to_s3 and sync_datausa_to_s3 against a local HTTP server
+(synthetic BLS directory and Census tables) and an in-process S3 stub, see
+stubs.py. Nothing leaves the machine. For each scenario it reports wall
+time, HTTP requests/connections/bytes, S3 calls/bytes and peak RSS.
+
+BLS scenarios: cold (empty bucket), no-change, small-change (about 1% of
+the rows of one file revised) and full-change (every file revised).
+Census scenarios: cold (empty cache and bucket) and cached. With --fan-out
+the BLS runs shard their files over that many in-process workers.
+
+Usage (from the repository root):
+    python benchmarks/sync_benchmark.py [--files 20] [--rows 20000] [--fan-out 4] [--json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import bls_sync  # noqa: E402
+import datausa_sync  # noqa: E402
+from stubs import S3Stub, SourceServer, make_series_file  # noqa: E402
+
+
+class PeakRss:
+    """Samples the process RSS in the background and keeps the peak"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def sample(self):
+        try:
+            with open('/proc/self/statm') as statm:
+                rss = int(statm.read().split()[1]) * self._page_size
+        except OSError:  # No /proc: fall back to the lifetime peak
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            rss *= 1 if sys.platform == 'darwin' else 1024
+        self.peak = max(self.peak, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def measure(name, run, server, s3, verbose=False):
+    """Run one scenario and collect its metrics"""
+    server.reset_counters()
+    s3.reset_counters()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output, PeakRss() as rss:
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+    s3_calls = {op: count for op, count in s3.counters.items() if not op.startswith('bytes_')}
+    return {
+        'scenario': name,
+        'wall_s': round(elapsed, 3),
+        'http_requests': server.counters.get('requests', 0),
+        'http_304': server.counters.get('status_304', 0),
+        'http_connections': server.counters.get('connections', 0),
+        'http_bytes': server.counters.get('bytes_sent', 0),
+        's3_calls': sum(s3_calls.values()),
+        's3_bytes_in': s3.counters.get('bytes_in', 0),
+        's3_bytes_out': s3.counters.get('bytes_out', 0),
+        'peak_rss_mb': round(rss.peak / (1024 * 1024), 1),
+        's3_operations': s3_calls,
+        'result': result,
+    }
+
+
+def bls_scenarios(server, s3, args):
+    """Cold, no-change, small-change and full-change runs of sync_bls_to_s3"""
+    bls_sync.BLS_BASE_URL = server.bls_url
+    bls_sync.BLS_REQUESTS_PER_SECOND = args.rate
+    bls_sync.BEST_YEAR_SOURCE = 'pub/time.series/pr/pr.data.0.Bench'
+    bls_sync.s3_client = s3
+    bls_sync.SYNC_FAN_OUT_WORKERS = args.fan_out
+    dispatch = bls_sync.run_worker_locally if args.fan_out > 1 else None
+
+    def run():
+        return bls_sync.sync_bls_to_s3(dispatch=dispatch)
+
+    published = datetime.datetime(2025, 1, 2, 8, 30)
+    for index in range(args.files):
+        server.files[f"pr.data.{index}.Bench"] = (make_series_file(index, args.rows), published)
+
+    def revise(names, revision):
+        # Revisions are listed as published after the copies in the bucket were written
+        modified = datetime.datetime.utcnow() + datetime.timedelta(minutes=revision)
+        for name in names:
+            index = int(name.split('.')[2])
+            server.files[name] = (make_series_file(index, args.rows, revision), modified)
+
+    results = [measure('bls cold', run, server, s3, args.verbose)]
+    results.append(measure('bls no-change', run, server, s3, args.verbose))
+    revise(['pr.data.0.Bench'], 1)
+    results.append(measure('bls small-change', run, server, s3, args.verbose))
+    revise(list(server.files), 2)
+    results.append(measure('bls full-change', run, server, s3, args.verbose))
+    return results
+
+
+def census_scenarios(server, s3, args, cache_dir):
+    """Cold and cached runs of sync_datausa_to_s3"""
+    datausa_sync.API_URL_TEMPLATE = f"{server.base_url}/data/{{vintage}}/acs/acs5"
+    datausa_sync.CENSUS_VINTAGES = args.vintages
+    datausa_sync.CENSUS_GEOGRAPHIES = 'us:*,state:*'
+    datausa_sync.CACHE_DIR = cache_dir
+    datausa_sync.get_s3_client = lambda **kwargs: s3
+
+    for vintage in datausa_sync.parse_vintages(args.vintages):
+        server.census[(vintage, 'us:*')] = [
+            ['NAME', 'B01001_001E', 'us'], ['United States', str(310000000 + vintage * 1000), '1']
+        ]
+        server.census[(vintage, 'state:*')] = [['NAME', 'B01001_001E', 'state']] + [
+            [f"State {state}", str(6000000 + state * vintage), f"{state:02d}"] for state in range(1, 53)
+        ]
+
+    results = [measure('census cold', datausa_sync.sync_datausa_to_s3, server, s3, args.verbose)]
+    results.append(measure('census cached', datausa_sync.sync_datausa_to_s3, server, s3, args.verbose))
+    return results
+
+
+def print_table(results):
+    columns = [
+        ('scenario', 'scenario', 18), ('wall_s', 'wall s', 8), ('http_requests', 'http req', 9),
+        ('http_304', '304s', 6), ('http_connections', 'conns', 6), ('http_bytes', 'http bytes', 12),
+        ('s3_calls', 's3 calls', 9), ('s3_bytes_in', 's3 in', 12), ('s3_bytes_out', 's3 out', 12),
+        ('peak_rss_mb', 'rss MB', 8),
+    ]
+    print(' '.join(f"{title:>{width}}" for _, title, width in columns))
+    for result in results:
+        print(' '.join(f"{str(result[key]):>{width}}" for key, _, width in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=20, help='number of BLS series files')
+    parser.add_argument('--rows', type=int, default=20000, help='rows per BLS series file')
+    parser.add_argument('--vintages', default='2013-2022', help='Census vintages to serve and fetch')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='BLS requests per second (0 = unthrottled, to measure the code rather than the limit)')
+    parser.add_argument('--fan-out', type=int, default=0,
+                        help='shard the BLS files over this many in-process workers (0 = no fan-out)')
+    parser.add_argument('--json', action='store_true', help='print the full results as JSON')
+    parser.add_argument('--verbose', action='store_true', help='show the sync output')
+    args = parser.parse_args()
+
+    server = SourceServer()
+    cache_dir = tempfile.mkdtemp(prefix='census_cache_')
+    try:
+        results = bls_scenarios(server, S3Stub(), args)
+        results += census_scenarios(server, S3Stub(), args, cache_dir)
+    finally:
+        server.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Incrementally maintained aggregates over the BLS series data
+
+BestYearAggregate keeps the per-(series_id, year) sums behind the "best year
+per series" report together with each series' current best year. Row changes
+from the sync's change feed (see bls_diff.py) update it in time proportional
+to the number of changed rows, so the report never needs a full rescan.
+"""
+
+import json
+
+
+def parse_value(text):
+    """Return a row's value as a float, or None when it is not numeric"""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+class BestYearAggregate:
+    """
+    Sum of value per (series_id, year) plus each series' best year.
+    Ties between years go to the earliest year, as in analytics.py.
+    """
+
+    def __init__(self, sums=None, source_sha256=None):
+        # {series_id: {year: [total, row_count]}}
+        self.sums = sums or {}
+        self.best = {}
+        # SHA-256 of the source file version these sums describe
+        self.source_sha256 = source_sha256
+        for series_id in self.sums:
+            self._refresh(series_id)
+
+    @classmethod
+    def from_lines(cls, lines, source_sha256=None):
+        """Build the aggregate from every row of a series file"""
+        aggregate = cls(source_sha256=source_sha256)
+        for number, line in enumerate(lines):
+            fields = [field.strip() for field in line.rstrip('\r\n').split('\t')]
+            if number == 0 or len(fields) < 4:
+                continue
+            aggregate._add(fields, 1)
+        for series_id in aggregate.sums:
+            aggregate._refresh(series_id)
+        return aggregate
+
+    def _add(self, fields, sign):
+        """Add (sign=1) or remove (sign=-1) one row; returns the touched series_id"""
+        value = parse_value(fields[3])
+        if value is None or not fields[1].isdigit():
+            return None
+        series_id, year = fields[0], int(fields[1])
+        years = self.sums.setdefault(series_id, {})
+        total, count = years.get(year, [0.0, 0])
+        count += sign
+        if count <= 0:
+            years.pop(year, None)
+            if not years:
+                del self.sums[series_id]
+        else:
+            # Round away the drift that repeated add/subtract leaves behind
+            years[year] = [round(total + sign * value, 9), count]
+        return series_id
+
+    def _refresh(self, series_id):
+        """Recompute one series' best year from its yearly sums"""
+        years = self.sums.get(series_id)
+        if not years:
+            self.best.pop(series_id, None)
+            return
+        self.best[series_id] = min(years, key=lambda year: (-years[year][0], year))
+
+    def apply_row_changes(self, changes, source_sha256=None):
+        """
+        Apply (kind, old_fields, new_fields) row changes, as read back from
+        the change feed with bls_diff.read_row_changes. Only the series that
+        were touched get their best year recomputed.
+        """
+        touched = set()
+        for kind, old_fields, new_fields in changes:
+            if old_fields is not None:
+                touched.add(self._add(old_fields, -1))
+            if new_fields is not None:
+                touched.add(self._add(new_fields, 1))
+        for series_id in touched - {None}:
+            self._refresh(series_id)
+        self.source_sha256 = source_sha256
+
+    def best_years(self):
+        """The report: [{'series_id', 'year', 'total_value'}] sorted by series_id"""
+        return [
+            {'series_id': series_id, 'year': year, 'total_value': self.sums[series_id][year][0]}
+            for series_id, year in sorted(self.best.items())
+        ]
+
+    def to_json(self):
+        """Serialize for storage next to the synced data"""
+        return json.dumps({
+            'source_sha256': self.source_sha256,
+            'sums': {
+                series_id: {str(year): total for year, total in years.items()}
+                for series_id, years in self.sums.items()
+            },
+            'best_years': self.best_years()
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        """Load an aggregate written by to_json()"""
+        data = json.loads(text)
+        sums = {
+            series_id: {int(year): total for year, total in years.items()}
+            for series_id, years in data['sums'].items()
+        }
+        return cls(sums, source_sha256=data.get('source_sha256'))
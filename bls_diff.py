@@ -0,0 +1,110 @@
+"""
+Row-level diff for BLS tab-delimited time-series files (pr.data.*)
+
+The files are sorted by series_id, year and period, so two versions can be
+compared in a single sorted-merge pass that holds one row of each side in
+memory at a time, however large the files are. The changes are written as
+NDJSON, one changed row per line, so they never have to fit in memory either.
+"""
+
+import json
+import sys
+
+# Rows are identified by these leading columns: series_id, year, period
+KEY_COLUMNS = 3
+
+
+class UnsortedInputError(ValueError):
+    """Raised when a file is not sorted by (series_id, year, period)"""
+
+
+class TooManyChangesError(ValueError):
+    """Raised when a diff exceeds the number of changed rows it may write"""
+
+
+def parse_rows(lines):
+    """
+    Yield (key, fields) for every data row of a series file.
+    Skips the header line and blank or short lines, strips the padding BLS
+    puts around values and checks that keys arrive in ascending order.
+    """
+    previous_key = None
+    for number, line in enumerate(lines):
+        if number == 0:
+            continue  # header: series_id year period value footnote_codes
+        fields = [field.strip() for field in line.rstrip('\r\n').split('\t')]
+        if len(fields) <= KEY_COLUMNS:
+            continue
+        key = tuple(fields[:KEY_COLUMNS])
+        if previous_key is not None and key <= previous_key:
+            raise UnsortedInputError(f"Row {number + 1} key {key} does not follow {previous_key}")
+        previous_key = key
+        yield key, fields
+
+
+def iter_row_changes(old_lines, new_lines):
+    """
+    Merge two sorted versions of a series file.
+    Yields ('inserted', None, new_fields), ('updated', old_fields, new_fields)
+    and ('deleted', old_fields, None) tuples in key order; identical rows are
+    not reported.
+    """
+    old_rows = parse_rows(old_lines)
+    new_rows = parse_rows(new_lines)
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield 'deleted', old[1], None
+            old = next(old_rows, None)
+        elif old is None or new[0] < old[0]:
+            yield 'inserted', None, new[1]
+            new = next(new_rows, None)
+        else:
+            if old[1] != new[1]:
+                yield 'updated', old[1], new[1]
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+
+
+def write_row_changes(changes, stream, max_changes=None):
+    """
+    Write (kind, old_fields, new_fields) row changes to a text stream as
+    NDJSON lines such as {"change": "updated", "old": [...], "new": [...]}.
+    Raises TooManyChangesError once more than `max_changes` rows changed.
+    Returns the number of 'inserted', 'updated' and 'deleted' rows.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+    for kind, old_fields, new_fields in changes:
+        counts[kind] += 1
+        if max_changes is not None and sum(counts.values()) > max_changes:
+            raise TooManyChangesError(f"More than {max_changes} rows changed")
+        record = {'change': kind}
+        if old_fields is not None:
+            record['old'] = old_fields
+        if new_fields is not None:
+            record['new'] = new_fields
+        stream.write(json.dumps(record) + '\n')
+    return counts
+
+
+def read_row_changes(lines):
+    """Yield the (kind, old_fields, new_fields) row changes of NDJSON written by write_row_changes"""
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            yield record['change'], record.get('old'), record.get('new')
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python bls_diff.py OLD_FILE NEW_FILE")
+        sys.exit(1)
+
+    with open(sys.argv[1], encoding='utf-8') as old_file, open(sys.argv[2], encoding='utf-8') as new_file:
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        for kind, old_fields, new_fields in iter_row_changes(old_file, new_file):
+            counts[kind] += 1
+            print(f"{kind}\t" + '\t'.join(new_fields or old_fields))
+    print(f"INFO: {counts['inserted']} inserted, {counts['updated']} updated, {counts['deleted']} deleted")
@@ -0,0 +1,271 @@
+"""
+Indexed lookup of BLS series values with population by year
+
+Builds a SQLite store of the synced BLS series file, clustered on
+(series_id, period, year), alongside the population for each year. A
+single-series query such as PRS30006032/Q01 is then an index range scan
+that returns in milliseconds, with no cluster or full-file scan. The store
+records the S3 ETags of the files it was built from and is rebuilt as soon
+as either of them changes.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+from botocore.exceptions import ClientError
+
+from connections import LazyConnection, get_s3_client
+from population_stats import loads_population_data, population_records
+
+# Configuration
+S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'yemi-data-quest')
+BLS_KEY = os.environ.get('BLS_KEY', 'bls/pr/pub/time.series/pr/pr.data.0.Current')
+POPULATION_KEY = os.environ.get('POPULATION_KEY', 'part2/population_data.json')
+LOOKUP_KEY = os.environ.get('LOOKUP_KEY', 'bls/pr/_lookup/bls_lookup.sqlite')
+LOCAL_DB_PATH = os.path.join(tempfile.gettempdir(), 'bls_lookup.sqlite')
+
+# Shared across warm invocations, so queries reuse its open connections
+s3_client = LazyConnection(get_s3_client)
+
+SCHEMA = """
+CREATE TABLE observations (
+    series_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    value REAL,
+    footnote_codes TEXT,
+    PRIMARY KEY (series_id, period, year)
+) WITHOUT ROWID;
+CREATE TABLE population (
+    year INTEGER PRIMARY KEY,
+    population INTEGER NOT NULL
+);
+CREATE TABLE sources (
+    key TEXT PRIMARY KEY,
+    etag TEXT NOT NULL
+);
+"""
+
+# Kept open across warm Lambda invocations
+_connection = None
+
+
+def build_lookup_db(db_path, bls_lines, population_data, sources=None):
+    """
+    Create the lookup store at `db_path` from the lines of a BLS series
+    file and population JSON (any layout population_stats understands).
+    `sources` maps each source S3 key to the ETag of the copy that was read.
+
+    Returns:
+        int: Number of observations stored
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+
+        def observations():
+            for number, line in enumerate(bls_lines):
+                fields = [field.strip() for field in line.rstrip('\r\n').split('\t')]
+                if number == 0 or len(fields) < 4 or not fields[1].isdigit():
+                    continue
+                try:
+                    value = float(fields[3])
+                except ValueError:
+                    value = None
+                footnote = fields[4] if len(fields) > 4 and fields[4] else None
+                yield fields[0], fields[2], int(fields[1]), value, footnote
+
+        conn.executemany("INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?)", observations())
+        # One population per year; the first record for a year wins
+        conn.executemany(
+            "INSERT OR IGNORE INTO population VALUES (?, ?)",
+            ((year, int(population)) for year, population in population_records(population_data))
+        )
+        conn.executemany("INSERT INTO sources VALUES (?, ?)", sorted((sources or {}).items()))
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+        conn.execute("VACUUM")
+        return count
+    finally:
+        conn.close()
+
+
+def lookup_series(conn, series_id, period):
+    """
+    Values of one series/period joined with the population of the same year.
+
+    Returns:
+        list: [{'series_id', 'year', 'period', 'value', 'Population'}] ordered by year
+    """
+    rows = conn.execute(
+        """
+        SELECT o.series_id, o.year, o.period, o.value, p.population
+        FROM observations o LEFT JOIN population p ON p.year = o.year
+        WHERE o.series_id = ? AND o.period = ?
+        ORDER BY o.year
+        """,
+        (series_id.strip(), period.strip())
+    ).fetchall()
+    return [
+        {'series_id': row[0], 'year': row[1], 'period': row[2], 'value': row[3], 'Population': row[4]}
+        for row in rows
+    ]
+
+
+def source_etags(s3_client, bucket):
+    """
+    Current ETags of the files the store is built from.
+
+    Returns:
+        dict: {s3_key: etag} for the BLS series file and the population data
+    """
+    return {
+        key: s3_client.head_object(Bucket=bucket, Key=key)['ETag'].strip('"')
+        for key in (BLS_KEY, POPULATION_KEY)
+    }
+
+
+def stored_source_etags(conn):
+    """Source ETags recorded in a store; {} for stores built before they were recorded"""
+    try:
+        return dict(conn.execute("SELECT key, etag FROM sources").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+
+
+def local_source_etags():
+    """Source ETags of the store in /tmp, or None if there is none"""
+    if not os.path.exists(LOCAL_DB_PATH):
+        return None
+    conn = sqlite3.connect(LOCAL_DB_PATH)
+    try:
+        return stored_source_etags(conn)
+    finally:
+        conn.close()
+
+
+def uploaded_source_etags(s3_client, bucket):
+    """Source ETags of the store in S3 (from its metadata), or None if there is none"""
+    try:
+        metadata = s3_client.head_object(Bucket=bucket, Key=LOOKUP_KEY).get('Metadata', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(metadata.get('source-etags', '{}'))
+
+
+def build_and_upload(s3_client, bucket):
+    """
+    Build the lookup store from the synced data in S3 and upload it,
+    recording the ETags of the copies read.
+
+    Returns:
+        int: Number of observations stored
+    """
+    bls_response = s3_client.get_object(Bucket=bucket, Key=BLS_KEY)
+    population_response = s3_client.get_object(Bucket=bucket, Key=POPULATION_KEY)
+    sources = {
+        BLS_KEY: bls_response['ETag'].strip('"'),
+        POPULATION_KEY: population_response['ETag'].strip('"')
+    }
+    count = build_lookup_db(
+        LOCAL_DB_PATH,
+        (line.decode('utf-8') for line in bls_response['Body'].iter_lines()),
+        loads_population_data(population_response['Body'].read()),
+        sources
+    )
+    s3_client.upload_file(
+        LOCAL_DB_PATH, bucket, LOOKUP_KEY,
+        ExtraArgs={'Metadata': {'source-etags': json.dumps(sources, sort_keys=True)}}
+    )
+    print(f"INFO: Built lookup store with {count} observations at s3://{bucket}/{LOOKUP_KEY}")
+    return count
+
+
+def close_connection():
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def get_connection(s3_client, bucket):
+    """
+    Open the lookup store for the current BLS and population data.
+    Every call checks the sources' ETags (one HEAD request each), so warm
+    containers notice new syncs and rebuilds made by other containers. A
+    stale store is replaced by the uploaded one if that is current, and
+    rebuilt otherwise.
+    """
+    global _connection
+    current = source_etags(s3_client, bucket)
+    if _connection is not None and stored_source_etags(_connection) == current:
+        return _connection
+
+    close_connection()
+    if local_source_etags() != current:
+        if uploaded_source_etags(s3_client, bucket) == current:
+            s3_client.download_file(bucket, LOOKUP_KEY, LOCAL_DB_PATH)
+        else:
+            build_and_upload(s3_client, bucket)
+    _connection = sqlite3.connect(LOCAL_DB_PATH, check_same_thread=False)
+    return _connection
+
+
+def lambda_handler(event, context):
+    """
+    AWS Lambda handler function.
+    {"series_id": "PRS30006032", "period": "Q01"} queries the store;
+    {"rebuild": true} rebuilds it from the synced data first.
+
+    Returns:
+        dict: Lambda response with statusCode and body
+    """
+    try:
+        if event.get('rebuild'):
+            close_connection()
+            build_and_upload(s3_client, S3_BUCKET_NAME)
+        if 'series_id' not in event:
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'message': 'Lookup store ready'})
+            }
+
+        rows = lookup_series(get_connection(s3_client, S3_BUCKET_NAME), event['series_id'], event.get('period', 'Q01'))
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'results': rows})
+        }
+
+    except Exception as e:
+        print(f"ERROR: Lookup failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Lookup failed',
+                'message': str(e)
+            })
+        }
+
+
+# For local testing:
+#   python bls_lookup.py build pr.data.0.Current population_data.json lookup.sqlite
+#   python bls_lookup.py query lookup.sqlite PRS30006032 Q01
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 5 and sys.argv[1] == 'build':
+        with open(sys.argv[2], encoding='utf-8') as bls_file, open(sys.argv[3], 'rb') as population_file:
+            count = build_lookup_db(sys.argv[4], bls_file, loads_population_data(population_file.read()))
+        print(f"INFO: Stored {count} observations in {sys.argv[4]}")
+    elif len(sys.argv) == 5 and sys.argv[1] == 'query':
+        conn = sqlite3.connect(sys.argv[2])
+        print(json.dumps(lookup_series(conn, sys.argv[3], sys.argv[4]), indent=2))
+    else:
+        print("Usage: python bls_lookup.py build BLS_FILE POPULATION_JSON DB | query DB SERIES_ID PERIOD")
+        sys.exit(1)
@@ -0,0 +1,115 @@
+"""
+Columnar Parquet export of BLS series files (pr.data.*)
+
+Converts the tab-separated series files into typed, compressed Parquet,
+one file per year, so readers can prune by year and column and skip the
+cast/trim pass. Needs pyarrow, which is not part of the sync's own
+dependencies (on Lambda, attach the AWS SDK for pandas layer). pyarrow is
+only imported once an export runs, so it never adds to cold-start time.
+"""
+
+import os
+
+# Loaded by load_pyarrow() on first use
+pa = None
+pq = None
+
+COMPRESSION = 'snappy'
+BUFFER_ROWS = 100000  # Rows held in memory across all years before a row group is written
+
+
+def load_pyarrow():
+    """Import pyarrow on first use; True when it is available"""
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # Export is optional; the sync runs without it
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+
+def pyarrow_available():
+    """True when pyarrow can be imported"""
+    return load_pyarrow()
+
+
+def get_schema():
+    """Arrow schema of an exported series file (year is the partition key)"""
+    return pa.schema([
+        ('series_id', pa.string()),
+        ('period', pa.string()),
+        ('value', pa.float64()),
+        ('footnote_codes', pa.string()),
+    ])
+
+
+def parse_value(text):
+    """BLS values are decimals; blanks and markers such as '-' become nulls"""
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_series_row(line):
+    """
+    Split one series file line into (year, fields), trimming the padding BLS
+    puts around fields. Returns None for the header and any row without a
+    numeric year.
+    """
+    fields = [field.strip() for field in line.rstrip('\r\n').split('\t')]
+    if len(fields) < 4 or not fields[1].isdigit():
+        return None
+    return int(fields[1]), fields
+
+
+def write_series_partitions(lines, directory, compression=COMPRESSION, buffer_rows=BUFFER_ROWS):
+    """
+    Stream a series file into one Parquet file per year under `directory`.
+    Series files are ordered by series, not year, so every year's writer
+    stays open. Rows wait in per-year buffers; whenever `buffer_rows` rows
+    are buffered in all, the largest buffer is written out as a row group,
+    so memory no longer grows with the file.
+    Returns {year: path}; raises RuntimeError if pyarrow is missing.
+    """
+    if not pyarrow_available():
+        raise RuntimeError("pyarrow is required for Parquet export")
+
+    schema = get_schema()
+    writers, buffers, paths = {}, {}, {}
+    buffered = 0
+
+    def flush(year):
+        nonlocal buffered
+        columns = buffers.pop(year)
+        buffered -= len(columns['series_id'])
+        if year not in writers:
+            paths[year] = os.path.join(directory, f"year={year}.parquet")
+            writers[year] = pq.ParquetWriter(paths[year], schema, compression=compression)
+        writers[year].write_table(pa.Table.from_pydict(columns, schema=schema))
+
+    try:
+        for number, line in enumerate(lines):
+            row = parse_series_row(line) if number else None  # line 0 is the header
+            if row is None:
+                continue
+            year, fields = row
+            columns = buffers.setdefault(year, {
+                'series_id': [], 'period': [], 'value': [], 'footnote_codes': []
+            })
+            columns['series_id'].append(fields[0])
+            columns['period'].append(fields[2])
+            columns['value'].append(parse_value(fields[3]))
+            columns['footnote_codes'].append(fields[4] if len(fields) > 4 and fields[4] else None)
+            buffered += 1
+            if buffered >= buffer_rows:
+                flush(max(buffers, key=lambda year: len(buffers[year]['series_id'])))
+        for year in list(buffers):
+            flush(year)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
@@ -0,0 +1,109 @@
+"""
+Shared connection management for the sync Lambdas
+
+HTTP sessions and S3 clients are created once per execution environment and
+kept at module level, so warm invocations reuse pooled keep-alive sockets
+instead of paying DNS, TCP and TLS setup for every request. boto3 and
+requests are imported on first use, keeping them out of cold-start init.
+"""
+
+import threading
+
+_sessions = {}
+_s3_clients = {}
+_lambda_client = None
+_lock = threading.Lock()
+
+
+def get_session(name, pool_maxsize=10, max_retries=0, headers=None):
+    """
+    Return the pooled session registered under `name`, creating it on first use.
+
+    Args:
+        name (str): Session name, one per remote service
+        pool_maxsize (int): Connections kept open per host; match the worker count
+        max_retries: Retry count or urllib3 Retry policy for the adapter
+        headers (dict): Default headers sent with every request
+
+    Returns:
+        requests.Session: The shared session
+    """
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=max_retries)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if headers:
+                session.headers.update(headers)
+            _sessions[name] = session
+        return session
+
+
+def get_s3_client(max_pool_connections=10):
+    """
+    Return the shared S3 client for a connection pool size.
+    boto3 clients are thread-safe, so every worker thread can use the same one.
+
+    Args:
+        max_pool_connections (int): Connections kept open to S3; match the worker count
+
+    Returns:
+        botocore.client.S3: The shared client
+    """
+    with _lock:
+        client = _s3_clients.get(max_pool_connections)
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client('s3', config=Config(
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True
+            ))
+            _s3_clients[max_pool_connections] = client
+        return client
+
+
+def get_lambda_client():
+    """
+    Return the shared Lambda client, used by a sync to invoke its own function.
+    Synchronous invocations wait as long as a Lambda can run and are not
+    retried, so a slow worker is neither cut off nor started twice.
+
+    Returns:
+        botocore.client.Lambda: The shared client
+    """
+    global _lambda_client
+    with _lock:
+        if _lambda_client is None:
+            import boto3
+            from botocore.config import Config
+
+            _lambda_client = boto3.client('lambda', config=Config(
+                read_timeout=900,
+                max_pool_connections=50,
+                retries={'total_max_attempts': 1},
+                tcp_keepalive=True
+            ))
+        return _lambda_client
+
+
+class LazyConnection:
+    """
+    Module-level stand-in for a client or session that is only created,
+    through `factory`, when one of its attributes is first used.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+
+    def __getattr__(self, name):
+        if self._target is None:
+            self._target = self._factory()
+        return getattr(self._target, name)
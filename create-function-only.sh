@@ -17,7 +17,7 @@ rm -f $PACKAGE_NAME
 
 # Create the function package (just the code)
 echo "📦 Creating function package..."
-zip $PACKAGE_NAME lambda_function.py
+zip $PACKAGE_NAME lambda_function.py bls_aggregates.py bls_diff.py bls_parquet.py connections.py sync_metrics.py sync_logging.py
 
 # Display package info
 echo "📊 Function package information:"
@@ -1,32 +1,280 @@
+import gzip
+import hashlib
 import json
 import os
-import boto3
-import requests
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from botocore.exceptions import ClientError
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from connections import get_s3_client, get_session
+from sync_logging import EventSummary, clear_context, fields, get_logger, set_context
+from sync_metrics import SyncMetrics
+
+from population_stats import build_yearly_stats, yearly_stats_from_json, yearly_stats_to_json
 
 # Configuration
 # Using US Census Bureau API instead of deprecated DataUSA API
-API_URL = "https://api.census.gov/data/2022/acs/acs5?get=NAME,B01001_001E&for=us:*"
+API_URL_TEMPLATE = "https://api.census.gov/data/{vintage}/acs/acs5"
+# ACS vintages to fetch, e.g. "2022" or "2013-2018,2022"
+CENSUS_VINTAGES = os.environ.get('CENSUS_VINTAGES', '2022')
+# Census "for" clauses, e.g. "us:*,state:*,county:*"
+CENSUS_GEOGRAPHIES = os.environ.get('CENSUS_GEOGRAPHIES', 'us:*')
+CENSUS_VARIABLES = os.environ.get('CENSUS_VARIABLES', 'NAME,B01001_001E')
+# Concurrent Census requests, and pooled connections kept open for them
+CENSUS_MAX_WORKERS = int(os.environ.get('CENSUS_MAX_WORKERS', '8'))
 S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'yemi-data-quest')
 S3_PREFIX = 'part2/'
-OUTPUT_FILENAME = 'population_data.json'
+OUTPUT_BASENAME = 'population_data'
+# "json" (one compact document) or "ndjson" (one typed record per line)
+OUTPUT_FORMAT = os.environ.get('OUTPUT_FORMAT', 'json').lower()
+OUTPUT_GZIP = os.environ.get('OUTPUT_GZIP', 'false').lower() == 'true'
+# Columns kept as strings even when their values look numeric
+STRING_COLUMNS = {'NAME', 'geography', 'geo_id'}
+STATS_FILENAME = 'population_stats.json'  # Mergeable per-year partial statistics
+# Field names and types of the population data, for every OUTPUT_FORMAT
+SCHEMA_FILENAME = f"{OUTPUT_BASENAME}.schema.json"
+
+# Census response cache, keyed on request URL, in /tmp and under part2/_cache/ in S3
+CENSUS_CACHE = os.environ.get('CENSUS_CACHE', 'true').lower() == 'true'
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'census_cache')
+CACHE_PREFIX = f"{S3_PREFIX}_cache/"
+# Vintages still within their release window may be revised; older ones are immutable
+CENSUS_CACHE_TTL = int(os.environ.get('CENSUS_CACHE_TTL', 24 * 3600))
+CENSUS_CACHE_TTL_PUBLISHED = int(os.environ.get('CENSUS_CACHE_TTL_PUBLISHED', 30 * 24 * 3600))
+CENSUS_CACHE_MAX_ENTRIES = int(os.environ.get('CENSUS_CACHE_MAX_ENTRIES', 256))
+
+log = get_logger('datausa_sync')
+# Timing, counters and per-table events of the current run; replaced at the start of each sync
+metrics = SyncMetrics('datausa_sync')
+events = EventSummary(log)
+
+
+def parse_vintages(spec):
+    """
+    Parse a vintage list such as "2013-2018,2022".
+    
+    Returns:
+        list: Sorted, de-duplicated vintage years
+    """
+    vintages = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = part.split('-', 1)
+            vintages.update(range(int(start), int(end) + 1))
+        elif part:
+            vintages.add(int(part))
+    return sorted(vintages)
+
+
+def build_request_url(vintage, geography, variables):
+    """Census API URL for one vintage and geography"""
+    return f"{API_URL_TEMPLATE.format(vintage=vintage)}?get={','.join(variables)}&for={geography}"
+
+
+def get_census_session():
+    """Pooled keep-alive session with the retry strategy, shared across warm invocations"""
+    from urllib3.util.retry import Retry
+
+    # Configure retry strategy
+    retry_strategy = Retry(
+        total=3,  # Total number of retries
+        backoff_factor=1,  # Wait time between retries: {backoff factor} * (2 ^ ({number of total retries} - 1))
+        status_forcelist=[429, 500, 502, 503, 504],  # HTTP status codes to retry on
+        allowed_methods=["HEAD", "GET", "OPTIONS"]  # HTTP methods to retry
+    )
+    return get_session('census', pool_maxsize=CENSUS_MAX_WORKERS, max_retries=retry_strategy)
+
+
+def fetch_census_table(session, url, headers):
+    """
+    Fetch one Census API table.
+    
+    Returns:
+        list: Rows, the first of which holds the column names
+    """
+    started = time.perf_counter()
+    response = session.get(
+        url, 
+        headers=headers, 
+        timeout=(10, 30),  # (connect timeout, read timeout)
+        verify=True
+    )
+    metrics.observe('request', (time.perf_counter() - started) * 1000)
+    # urllib3 keeps the retries it made for this request
+    retries = getattr(response.raw, 'retries', None)
+    if retries is not None and retries.history:
+        metrics.count('retries', len(retries.history))
+    metrics.count('bytes_fetched', len(response.content))
+    response.raise_for_status()
+    return response.json()
+
 
+def cache_ttl(vintage):
+    """
+    Cache lifetime in seconds for one vintage. ACS 5-year vintage Y is
+    released in December of Y+1, so anything older is treated as final.
+    """
+    if int(vintage) <= datetime.utcnow().year - 2:
+        return CENSUS_CACHE_TTL_PUBLISHED
+    return CENSUS_CACHE_TTL
+
+
+def cache_key(url):
+    """Cache file name for a request URL"""
+    return f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+
+def evict_cache():
+    """
+    Drop expired entries from the /tmp cache, then the least recently
+    written ones beyond CENSUS_CACHE_MAX_ENTRIES.
+    """
+    try:
+        names = os.listdir(CACHE_DIR)
+    except FileNotFoundError:
+        return
+    now = time.time()
+    entries = []
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            with open(path) as cache_file:
+                expires_at = json.load(cache_file).get('expires_at', 0)
+            if expires_at <= now:
+                os.remove(path)
+            else:
+                entries.append((os.path.getmtime(path), path))
+        except (OSError, ValueError):
+            continue
+    for _, path in sorted(entries)[:max(len(entries) - CENSUS_CACHE_MAX_ENTRIES, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_cached_table(url, s3_client=None, bucket=S3_BUCKET_NAME):
+    """
+    Look up a cached Census table, first in /tmp, then in S3.
+    An S3 hit is copied to /tmp for later warm invocations; an expired S3
+    entry is deleted (entries no longer requested are left to the bucket's
+    lifecycle rule, see DEPLOYMENT.md).
+    
+    Returns:
+        list: The cached table, or None on a miss or an expired entry
+    """
+    key = cache_key(url)
+    path = os.path.join(CACHE_DIR, key)
+    try:
+        with open(path) as cache_file:
+            entry = json.load(cache_file)
+        if entry.get('url') == url and entry.get('expires_at', 0) > time.time():
+            return entry['table']
+    except (OSError, ValueError):
+        pass
+    
+    if s3_client is None:
+        return None
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=f"{CACHE_PREFIX}{key}")
+        entry = json.loads(response['Body'].read())
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            log.warning(f"Could not read cache entry {key}: {str(e)}")
+        return None
+    if entry.get('url') != url:
+        return None
+    if entry.get('expires_at', 0) <= time.time():
+        try:
+            s3_client.delete_object(Bucket=bucket, Key=f"{CACHE_PREFIX}{key}")
+        except ClientError as e:
+            log.warning(f"Could not delete expired cache entry {key}: {str(e)}")
+        return None
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, 'w') as cache_file:
+        json.dump(entry, cache_file)
+    return entry['table']
 
-def fetch_population_data():
+
+def write_cached_table(url, table, ttl, s3_client=None, bucket=S3_BUCKET_NAME):
+    """Store a Census table in /tmp and, when a client is given, in S3"""
+    key = cache_key(url)
+    entry = json.dumps({
+        'url': url,
+        'fetched_at': datetime.utcnow().isoformat(),
+        'expires_at': time.time() + ttl,
+        'table': table
+    })
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, key), 'w') as cache_file:
+        cache_file.write(entry)
+    if s3_client is not None:
+        try:
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=f"{CACHE_PREFIX}{key}",
+                Body=entry.encode('utf-8'),
+                ContentType='application/json'
+            )
+        except ClientError as e:
+            log.warning(f"Could not write cache entry {key}: {str(e)}")
+
+
+def get_census_table(session, url, headers, vintage, s3_client=None):
+    """
+    Return one Census table from the cache, fetching and caching it on a miss.
+    
+    Returns:
+        list: Rows, the first of which holds the column names
+    """
+    if CENSUS_CACHE:
+        with metrics.phase('cache_read'):
+            table = read_cached_table(url, s3_client)
+        if table is not None:
+            metrics.count('cache_hits')
+            events.record('cache_hit', url)
+            return table
+        metrics.count('cache_misses')
+    with metrics.phase('fetch'):
+        table = fetch_census_table(session, url, headers)
+    events.record('fetched', url)
+    if CENSUS_CACHE:
+        with metrics.phase('cache_write'):
+            write_cached_table(url, table, cache_ttl(vintage), s3_client)
+    return table
+
+
+def fetch_population_data(vintages=None, geographies=None, variables=None, s3_client=None):
     """
     Fetch population data from the US Census Bureau API with retry logic.
+    One request per vintage and geography is issued concurrently (up to
+    CENSUS_MAX_WORKERS at once) over the shared pooled session, and the
+    results are merged into one dataset.
+    Tables still fresh in the response cache are not requested again.
+    
+    Args:
+        vintages (list): ACS vintages (default: CENSUS_VINTAGES)
+        geographies (list): Census "for" clauses (default: CENSUS_GEOGRAPHIES)
+        variables (list): Variables to fetch (default: CENSUS_VARIABLES)
+        s3_client: Optional Boto3 S3 client backing the response cache
     
     Returns:
-        dict: JSON response from the API
+        dict: headers (the variables, then geography, geo_id and year), data
+              rows sorted by year, total_records, api_source and vintages
     
     Raises:
-        Exception: If the API request fails after all retries
+        Exception: If any API request fails after all retries
     """
-    print(f"INFO: Fetching data from US Census Bureau API...")
+    import requests
+
+    vintages = vintages or parse_vintages(CENSUS_VINTAGES)
+    geographies = geographies or [g.strip() for g in CENSUS_GEOGRAPHIES.split(',') if g.strip()]
+    variables = variables or [v.strip() for v in CENSUS_VARIABLES.split(',') if v.strip()]
+    requests_to_make = [(vintage, geography) for vintage in vintages for geography in geographies]
+    log.info(f"Fetching {len(requests_to_make)} tables from US Census Bureau API...")
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -34,70 +282,174 @@ def fetch_population_data():
         'Connection': 'keep-alive'
     }
     
-    # Configure retry strategy
-    retry_strategy = Retry(
-        total=3,  # Total number of retries
-        backoff_factor=1,  # Wait time between retries: {backoff factor} * (2 ^ ({number of total retries} - 1))
-        status_forcelist=[429, 500, 502, 503, 504],  # HTTP status codes to retry on
-        allowed_methods=["HEAD", "GET", "OPTIONS"]  # HTTP methods to retry
-    )
-    
-    # Create session with retry strategy
-    session = requests.Session()
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    session = get_census_session()
     
     try:
-        print(f"INFO: Attempting to connect to US Census Bureau API...")
-        response = session.get(
-            API_URL, 
-            headers=headers, 
-            timeout=(10, 30),  # (connect timeout, read timeout)
-            verify=True
-        )
-        response.raise_for_status()
+        log.debug("Attempting to connect to US Census Bureau API...")
+        with ThreadPoolExecutor(max_workers=max(min(len(requests_to_make), CENSUS_MAX_WORKERS), 1)) as executor:
+            tables = list(executor.map(
+                lambda request: get_census_table(
+                    session, build_request_url(request[0], request[1], variables), headers, request[0], s3_client
+                ),
+                requests_to_make
+            ))
+        if CENSUS_CACHE:
+            evict_cache()
         
-        data = response.json()
+        # Census API returns each table as a list whose first row holds the headers.
+        # Trailing geography columns (us / state / state+county) differ per table,
+        # so they are folded into geography and geo_id columns.
+        records = []
+        for (vintage, geography), table in zip(requests_to_make, tables):
+            if not isinstance(table, list) or len(table) < 2:
+                continue
+            geo_level = geography.split(':', 1)[0]
+            for row in table[1:]:
+                geo_id = ''.join(str(code) for code in row[len(variables):])
+                records.append(list(row[:len(variables)]) + [geo_level, geo_id, vintage])
+        records.sort(key=lambda record: (record[-1], record[-3], record[-2]))
         
-        # Census API returns data as a list, convert to more structured format
-        if isinstance(data, list) and len(data) > 1:
-            headers = data[0]  # First row contains headers
-            records = data[1:]  # Rest are data records
-            
-            # Convert to structured format
-            structured_data = {
-                'headers': headers,
-                'data': records,
-                'total_records': len(records),
-                'api_source': 'US Census Bureau ACS 2022'
-            }
-            print(f"INFO: Successfully fetched {len(records)} records from US Census Bureau API")
-            return structured_data
-        else:
-            print(f"INFO: Successfully fetched data from US Census Bureau API")
-            return data
+        structured_data = {
+            'headers': variables + ['geography', 'geo_id', 'year'],
+            'data': records,
+            'total_records': len(records),
+            'api_source': f"US Census Bureau ACS {', '.join(str(vintage) for vintage in vintages)}",
+            'vintages': vintages
+        }
+        log.info(f"Successfully fetched {len(records)} records from US Census Bureau API")
+        return structured_data
     
     except requests.exceptions.ConnectTimeout as e:
-        print(f"ERROR: Connection timeout to US Census Bureau API: {str(e)}")
+        log.error(f"Connection timeout to US Census Bureau API: {str(e)}")
         raise Exception(f"Unable to connect to US Census Bureau API. This may be due to network issues or VPC configuration.")
     
     except requests.exceptions.ReadTimeout as e:
-        print(f"ERROR: Read timeout from US Census Bureau API: {str(e)}")
+        log.error(f"Read timeout from US Census Bureau API: {str(e)}")
         raise Exception(f"US Census Bureau API response timeout. The server may be slow or overloaded.")
     
     except requests.exceptions.RequestException as e:
-        print(f"ERROR: Failed to fetch data from API: {str(e)}")
+        log.error(f"Failed to fetch data from API: {str(e)}")
         raise Exception(f"API request failed: {str(e)}")
     
     except Exception as e:
-        print(f"ERROR: Unexpected error: {str(e)}")
+        log.error(f"Unexpected error: {str(e)}")
         raise
 
 
+def get_output_filename(output_format=None, compress=None):
+    """File name for the population data, e.g. population_data.ndjson.gz"""
+    output_format = output_format or OUTPUT_FORMAT
+    compress = OUTPUT_GZIP if compress is None else compress
+    extension = 'ndjson' if output_format == 'ndjson' else 'json'
+    return f"{OUTPUT_BASENAME}.{extension}{'.gz' if compress else ''}"
+
+
+def parse_typed_value(text, field_type):
+    """Cast one Census value to its schema type; None when it does not parse"""
+    if text is None or field_type == 'string':
+        return text
+    try:
+        return int(text) if field_type == 'integer' else float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_schema(data):
+    """
+    Field names and types of the population records. Census values arrive
+    as strings; a column is typed integer or number when all of its
+    non-empty values parse as such.
+    
+    Returns:
+        list: [{'name', 'type'}] in column order
+    """
+    schema = []
+    for index, name in enumerate(data['headers']):
+        values = [row[index] for row in data['data'] if row[index] not in (None, '')]
+        field_type = 'string'
+        if name not in STRING_COLUMNS and values:
+            if all(parse_typed_value(value, 'integer') is not None for value in values):
+                field_type = 'integer'
+            elif all(parse_typed_value(value, 'number') is not None for value in values):
+                field_type = 'number'
+        schema.append({'name': name, 'type': field_type})
+    return schema
+
+
+def serialize_population_data(data, output_format=None, compress=None):
+    """
+    Serialize the population data for upload.
+    "json" writes the headers/data document compactly with its schema added;
+    "ndjson" writes one typed record per line so readers can split the file.
+    Gzip output uses a fixed timestamp so unchanged data hashes the same.
+    
+    Returns:
+        tuple: (body bytes, content type, schema)
+    """
+    output_format = output_format or OUTPUT_FORMAT
+    compress = OUTPUT_GZIP if compress is None else compress
+    schema = build_schema(data)
+    if output_format == 'ndjson':
+        lines = []
+        for row in data['data']:
+            lines.append(json.dumps(
+                {field['name']: parse_typed_value(value, field['type']) for field, value in zip(schema, row)},
+                separators=(',', ':')
+            ))
+        body = ('\n'.join(lines) + '\n').encode('utf-8')
+        content_type = 'application/x-ndjson'
+    else:
+        body = json.dumps(dict(data, schema=schema), separators=(',', ':')).encode('utf-8')
+        content_type = 'application/json'
+    if compress:
+        body = gzip.compress(body, mtime=0)
+    return body, content_type, schema
+
+
+def get_stored_sha256(s3_client, bucket, s3_key, field='sha256'):
+    """SHA-256 recorded under `field` in the metadata of the stored object, or None"""
+    try:
+        response = s3_client.head_object(Bucket=bucket, Key=s3_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404', 'NotFound'):
+            raise
+        return None
+    return response.get('Metadata', {}).get(field)
+
+
+def upload_schema(s3_client, bucket, schema, source_sha256):
+    """
+    Store the schema of the population data as a sidecar JSON object.
+    Object metadata is limited to 2 KB, too little for a wide schema, and
+    NDJSON has no place for one in the file itself.
+    
+    Args:
+        s3_client: Boto3 S3 client
+        bucket (str): S3 bucket name
+        schema (list): [{'name', 'type'}] as returned by build_schema()
+        source_sha256 (str): SHA-256 of the data object the schema describes
+    
+    Returns:
+        str: S3 key of the schema object
+    """
+    s3_key = f"{S3_PREFIX}{SCHEMA_FILENAME}"
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=s3_key,
+        Body=json.dumps({'fields': schema, 'source_sha256': source_sha256}).encode('utf-8'),
+        ContentType='application/json',
+        Metadata={'source_sha256': source_sha256}
+    )
+    return s3_key
+
+
 def upload_json_to_s3(s3_client, bucket, data):
     """
-    Upload JSON data to S3.
+    Upload JSON data to S3 in the configured OUTPUT_FORMAT, unless the stored
+    object already has the same content. The schema is written first to the
+    SCHEMA_FILENAME sidecar, whose key the object metadata points to (the
+    "json" format also carries it inside the document). The sidecar is
+    rewritten whenever it is missing or describes other data.
     
     Args:
         s3_client: Boto3 S3 client
@@ -105,38 +457,100 @@ def upload_json_to_s3(s3_client, bucket, data):
         data (dict): JSON data to upload
     
     Returns:
-        str: S3 key where the file was uploaded
+        tuple: (S3 key of the file, whether it was uploaded, SHA-256 of the body)
     """
-    s3_key = f"{S3_PREFIX}{OUTPUT_FILENAME}"
+    s3_key = f"{S3_PREFIX}{get_output_filename()}"
     
     try:
-        # Convert data to JSON string with pretty formatting
-        json_content = json.dumps(data, indent=2)
+        with metrics.phase('serialize'):
+            body, content_type, schema = serialize_population_data(data)
+            sha256 = hashlib.sha256(body).hexdigest()
+        with metrics.phase('head'):
+            stored_sha256 = get_stored_sha256(s3_client, bucket, s3_key)
+            schema_sha256 = get_stored_sha256(s3_client, bucket, f"{S3_PREFIX}{SCHEMA_FILENAME}", 'source_sha256')
+        if schema_sha256 != sha256:
+            with metrics.phase('upload'):
+                schema_key = upload_schema(s3_client, bucket, schema, sha256)
+            log.info(f"Stored the population data schema at s3://{bucket}/{schema_key}")
+        if stored_sha256 == sha256:
+            log.info(f"s3://{bucket}/{s3_key} is unchanged, skipping upload")
+            return s3_key, False, sha256
         
         # Add metadata
         metadata = {
             'source': 'us-census-bureau-api',
             'fetch_timestamp': datetime.utcnow().isoformat(),
-            'record_count': str(len(data) if isinstance(data, list) else len(data.get('data', [])))
+            'record_count': str(len(data) if isinstance(data, list) else len(data.get('data', []))),
+            'sha256': sha256,
+            'format': OUTPUT_FORMAT,
+            'schema_key': f"{S3_PREFIX}{SCHEMA_FILENAME}"
         }
+        extra_args = {'ContentEncoding': 'gzip'} if OUTPUT_GZIP else {}
         
         # Upload to S3
-        s3_client.put_object(
-            Bucket=bucket,
-            Key=s3_key,
-            Body=json_content.encode('utf-8'),
-            ContentType='application/json',
-            Metadata=metadata
-        )
+        with metrics.phase('upload'):
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=s3_key,
+                Body=body,
+                ContentType=content_type,
+                Metadata=metadata,
+                **extra_args
+            )
+        metrics.count('bytes_uploaded', len(body))
         
-        print(f"INFO: Successfully uploaded data to s3://{bucket}/{s3_key}")
-        return s3_key
+        log.info(f"Successfully uploaded {len(body)} bytes to s3://{bucket}/{s3_key}")
+        return s3_key, True, sha256
     
     except ClientError as e:
-        print(f"ERROR: Failed to upload to S3: {str(e)}")
+        log.error(f"Failed to upload to S3: {str(e)}")
         raise
 
 
+def update_population_stats(s3_client, bucket, data, source_sha256=None):
+    """
+    Refresh the stored per-year population statistics.
+    Years present in `data` are recomputed in a single pass and merged into
+    the partials already stored, so year-range statistics can later be
+    answered with population_stats.range_statistics() without a rescan.
+    
+    Args:
+        s3_client: Boto3 S3 client
+        bucket (str): S3 bucket name
+        data (dict): Population data as returned by fetch_population_data()
+        source_sha256 (str): SHA-256 of the population data object the
+            statistics were built from, recorded so a missed refresh is noticed
+    
+    Returns:
+        str: S3 key of the statistics object
+    """
+    s3_key = f"{S3_PREFIX}{STATS_FILENAME}"
+    
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=s3_key)
+        yearly = yearly_stats_from_json(json.loads(response['Body'].read())['years'])
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        yearly = {}
+    
+    yearly.update(build_yearly_stats(data))
+    
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=s3_key,
+        Body=json.dumps({
+            'updated_at': datetime.utcnow().isoformat(),
+            'source_sha256': source_sha256,
+            'years': yearly_stats_to_json(yearly)
+        }).encode('utf-8'),
+        ContentType='application/json',
+        Metadata={'source_sha256': source_sha256} if source_sha256 else {}
+    )
+    log.info(f"Updated population statistics for {len(yearly)} years at s3://{bucket}/{s3_key}")
+    return s3_key
+
+
 def sync_datausa_to_s3():
     """
     Main function to fetch US Census Bureau API data and save to S3.
@@ -144,26 +558,38 @@ def sync_datausa_to_s3():
     Returns:
         dict: Summary of the sync operation
     """
-    print("INFO: Starting US Census Bureau API sync to S3...")
+    global metrics, events
+    metrics = SyncMetrics('datausa_sync')
+    events = EventSummary(log)
+    set_context(run_id=datetime.utcnow().strftime('%Y%m%dT%H%M%SZ'))
+    log.info("Starting US Census Bureau API sync to S3...")
     
-    # Initialize S3 client
-    s3_client = boto3.client('s3')
+    # Shared S3 client, reused by warm invocations
+    s3_client = get_s3_client(max_pool_connections=CENSUS_MAX_WORKERS)
     
-    # Fetch data from API
-    data = fetch_population_data()
+    # Fetch data from API (or the response cache)
+    data = fetch_population_data(s3_client=s3_client)
     
-    # Upload to S3
-    s3_key = upload_json_to_s3(s3_client, S3_BUCKET_NAME, data)
+    # Upload to S3; the statistics only change when the data does, but are also
+    # rebuilt when missing or built from other data (e.g. a failed earlier write)
+    s3_key, uploaded, sha256 = upload_json_to_s3(s3_client, S3_BUCKET_NAME, data)
+    stats_key = f"{S3_PREFIX}{STATS_FILENAME}"
+    with metrics.phase('stats'):
+        if uploaded or get_stored_sha256(s3_client, S3_BUCKET_NAME, stats_key, 'source_sha256') != sha256:
+            update_population_stats(s3_client, S3_BUCKET_NAME, data, sha256)
     
     summary = {
         'bucket': S3_BUCKET_NAME,
         's3_key': s3_key,
+        'uploaded': uploaded,
+        'stats_key': stats_key,
         'record_count': len(data) if isinstance(data, list) else len(data.get('data', [])),
         'timestamp': datetime.utcnow().isoformat()
     }
     
-    print(f"INFO: Sync completed successfully")
-    print(f"INFO: Summary: {json.dumps(summary, indent=2)}")
+    events.log()
+    log.info("Sync completed successfully", extra=fields(**summary))
+    metrics.emit()
     
     return summary
 
@@ -179,6 +605,8 @@ def lambda_handler(event, context):
     Returns:
         dict: Lambda response with statusCode and body
     """
+    clear_context()
+    set_context(request_id=getattr(context, 'aws_request_id', None))
     try:
         # Validate S3 bucket name
         if not S3_BUCKET_NAME:
@@ -196,12 +624,13 @@ def lambda_handler(event, context):
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'US Census Bureau API sync completed successfully',
-                'summary': summary
+                'summary': summary,
+                'metrics': metrics.summary()
             })
         }
     
     except Exception as e:
-        print(f"ERROR: Lambda execution failed: {str(e)}")
+        log.exception(f"Lambda execution failed: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -28,7 +28,7 @@ pip install -r requirements.txt -t $BUILD_DIR/$LAYER_DIR/
 
 # Copy the Lambda function code
 echo "📋 Copying Lambda function code..."
-cp datausa_sync.py $BUILD_DIR/
+cp datausa_sync.py population_stats.py connections.py sync_metrics.py sync_logging.py $BUILD_DIR/
 
 # Create the deployment package
 echo "📦 Creating deployment package..."
@@ -5,27 +5,169 @@ Syncs BLS time series data from https://download.bls.gov/pub/time.series/pr/ to
 
 import os
 import hashlib
-import requests
-from bs4 import BeautifulSoup
-import boto3
+import heapq
 from botocore.exceptions import ClientError
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+import threading
 import time
 import json
+import re
+import tempfile
+import uuid
+
+from bls_aggregates import BestYearAggregate
+from bls_diff import TooManyChangesError, iter_row_changes, read_row_changes, write_row_changes
+from bls_parquet import pyarrow_available, write_series_partitions
+from connections import LazyConnection, get_lambda_client, get_s3_client, get_session
+from sync_logging import EventSummary, clear_context, fields, get_logger, set_context
+from sync_metrics import SyncMetrics
 
 # Configuration
 BLS_BASE_URL = "https://download.bls.gov/pub/time.series/pr/"
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "yemi-data-quest")
 S3_PREFIX = "bls/pr/"  # Prefix for organizing files in S3
+# Sync state lives next to the data; keys starting with "_" are never synced or deleted
+MANIFEST_KEY = f"{S3_PREFIX}_manifest.json"
+CHECKPOINT_KEY = f"{S3_PREFIX}_checkpoint.json"  # Files done by a sync cut short by its deadline
+SHARD_RESULTS_PREFIX = f"{S3_PREFIX}_shards/"  # Fan-out worker results, removed once merged
+CHANGES_PREFIX = f"{S3_PREFIX}_changes/"  # One change record per run that changed anything
+# Row diffs are streamed to one NDJSON object per file; beyond this many changed
+# rows a file gets no diff and consumers fall back to rereading the whole file
+ROW_DIFF_MAX_CHANGES = int(os.environ.get("ROW_DIFF_MAX_CHANGES", "100000"))
+SNAPSHOT_PREFIX = f"{CHANGES_PREFIX}snapshots/"  # Previous copies kept just long enough to diff
+# Best year per series, kept current from the row changes of this file
+BEST_YEAR_SOURCE = os.environ.get("BEST_YEAR_SOURCE", "pub/time.series/pr/pr.data.0.Current")
+BEST_YEAR_AGGREGATE_KEY = f"{S3_PREFIX}_aggregates/best_year_per_series.json"
+
+# BLS listing times are US Eastern without a zone. Reading them as EST (UTC-5)
+# never places them earlier than the true instant, so comparisons stay safe.
+BLS_LISTING_TZ = timezone(timedelta(hours=-5))
+# They only show the minute: the file may have changed up to this much later
+BLS_LISTING_PRECISION = timedelta(minutes=1)
+# "1/28/2025  8:30 AM        19431 " preceding each link in the IIS listing
+LISTING_ENTRY_PATTERN = re.compile(
+    r'(\d{1,2}/\d{1,2}/\d{4})\s+(\d{1,2}:\d{2}\s*[AP]M)\s+(\d+)\s*$', re.IGNORECASE
+)
+
+# Concurrency limits: BLS fetches and S3 operations are throttled separately
+BLS_MAX_WORKERS = int(os.environ.get("BLS_MAX_WORKERS", "4"))
+S3_MAX_WORKERS = int(os.environ.get("S3_MAX_WORKERS", "8"))
+BLS_REQUESTS_PER_SECOND = float(os.environ.get("BLS_REQUESTS_PER_SECOND", "10"))
+# Files are streamed to S3 in parts of this size (S3 minimum is 5 MB), so peak
+# memory is about MULTIPART_CHUNK_SIZE x BLS_MAX_WORKERS regardless of file size
+MULTIPART_CHUNK_SIZE = int(os.environ.get("MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+DELETE_BATCH_SIZE = 1000  # DeleteObjects limit per request
+# Normally the manifest alone drives change detection; reconciliation also
+# lists the bucket to catch objects changed or removed outside the sync
+SYNC_RECONCILE = os.environ.get("SYNC_RECONCILE", "false").lower() == "true"
+# Optional: also write changed pr.data.* files as year-partitioned Parquet (needs pyarrow)
+PARQUET_EXPORT = os.environ.get("PARQUET_EXPORT", "false").lower() == "true"
+PARQUET_PREFIX = os.environ.get("PARQUET_PREFIX", "bls/parquet/")
+# Under Lambda, no new files are started once less than SYNC_TIME_RESERVE_MS
+# remain; the files done so far are checkpointed and the next invocation
+# resumes from there. SYNC_SELF_INVOKE starts that invocation right away.
+SYNC_TIME_RESERVE_MS = int(os.environ.get("SYNC_TIME_RESERVE_MS", "60000"))
+SYNC_SELF_INVOKE = os.environ.get("SYNC_SELF_INVOKE", "false").lower() == "true"
+SYNC_MAX_RESUMES = int(os.environ.get("SYNC_MAX_RESUMES", "20"))  # Self-invocations per sync
+# Fan-out: with more than one worker, the handler only plans the sync and sends
+# balanced shards of the files to worker invocations of SYNC_WORKER_FUNCTION
+# (default: this function), then merges their results into the manifest
+SYNC_FAN_OUT_WORKERS = int(os.environ.get("SYNC_FAN_OUT_WORKERS", "0"))
+SYNC_WORKER_FUNCTION = os.environ.get("SYNC_WORKER_FUNCTION")
+
+# Shared across warm invocations: one pooled client/session sized for every worker
+# thread. Both are created on first use so that boto3/requests stay out of init.
+s3_client = LazyConnection(lambda: get_s3_client(max_pool_connections=BLS_MAX_WORKERS + S3_MAX_WORKERS))
+bls_session = LazyConnection(lambda: get_session('bls', pool_maxsize=BLS_MAX_WORKERS + 1))
+
+_bls_slots = threading.BoundedSemaphore(BLS_MAX_WORKERS)
+_s3_slots = threading.BoundedSemaphore(S3_MAX_WORKERS)
+
+log = get_logger('bls_sync')
+# Timing, counters and per-file events of the current run; replaced at the start of each sync
+metrics = SyncMetrics('bls_sync')
+events = EventSummary(log)
+
+
+class RateLimiter:
+    """
+    Spaces out requests so that no more than `rate` start per second.
+    Shared by every worker thread talking to the same host.
+    """
+
+    def __init__(self, rate):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+
+    def acquire(self):
+        """Block until the caller may issue its next request"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            metrics.add_time('rate_limit_wait', wait)
+            time.sleep(wait)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
 
-# Initialize S3 client
-s3_client = boto3.client('s3')
+
+def get_rate_limiter(url):
+    """Return the shared rate limiter for the host serving `url`"""
+    host = urlparse(url).netloc
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = RateLimiter(BLS_REQUESTS_PER_SECOND)
+        return _rate_limiters[host]
+
+def parse_bls_listing(html):
+    """
+    Parse the BLS directory listing page.
+    Returns a list of {'name', 'size', 'mtime'} entries; size and mtime are
+    None when the listing line cannot be parsed.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    entries = []
+    
+    # Parse directory listing for file links
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if href and not href.startswith('?') and href != '../':
+            # Filter out directory navigation links
+            if not href.endswith('/'):
+                entry = {'name': href, 'size': None, 'mtime': None}
+                # Date and size are in the text node right before the link
+                preceding = link.previous_sibling
+                match = LISTING_ENTRY_PATTERN.search(str(preceding)) if preceding else None
+                if match:
+                    mtime = datetime.strptime(
+                        f"{match.group(1)} {match.group(2).upper().replace(' ', '')}",
+                        '%m/%d/%Y %I:%M%p'
+                    )
+                    entry['mtime'] = mtime.replace(tzinfo=BLS_LISTING_TZ)
+                    entry['size'] = int(match.group(3))
+                entries.append(entry)
+    
+    return entries
 
 def get_file_list_from_bls():
     """
     Fetch the list of files from the BLS website.
     Uses proper headers to avoid 403 Forbidden errors.
+    Returns structured entries, see parse_bls_listing().
     """
+    import requests
+
     headers = {
         'User-Agent': 'Mozilla/5.0 (compatible; RearcDataQuest/1.0; +https://rearc.io)',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -35,140 +177,834 @@ def get_file_list_from_bls():
     }
     
     try:
-        response = requests.get(BLS_BASE_URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        files = []
+        get_rate_limiter(BLS_BASE_URL).acquire()
+        with metrics.phase('list'):
+            response = bls_session.get(BLS_BASE_URL, headers=headers, timeout=30)
+            response.raise_for_status()
+            files = parse_bls_listing(response.content)
+        metrics.count('files_listed', len(files))
         
-        # Parse directory listing for file links
-        for link in soup.find_all('a'):
-            href = link.get('href')
-            if href and not href.startswith('?') and href != '../':
-                # Filter out directory navigation links
-                if not href.endswith('/'):
-                    files.append(href)
-        
-        print(f"INFO: Found {len(files)} files on BLS website")
+        log.info(f"Found {len(files)} files on BLS website")
         return files
     
     except requests.RequestException as e:
-        print(f"ERROR: Error fetching file list from BLS: {e}")
+        log.error(f"Error fetching file list from BLS: {e}")
         raise
 
-def calculate_md5(content):
-    """Calculate MD5 hash of file content"""
-    return hashlib.md5(content).hexdigest()
+def build_download_headers(validators=None):
+    """Request headers for a BLS file, conditional when validators are known"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (compatible; RearcDataQuest/1.0; +https://rearc.io)',
+    }
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
 
-def get_s3_file_metadata(filename):
+def get_response_validators(response):
+    """Extract the validators to send on the next conditional request"""
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
+    }
+
+def upload_to_s3(filename, content):
+    """Upload file content to S3. Returns the put_object response, or None on failure"""
+    # Clean filename to avoid double paths
+    clean_filename = filename.lstrip('/')
+    s3_key = f"{S3_PREFIX}{clean_filename}"
+    
+    try:
+        response = s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=s3_key,
+            Body=content,
+            ContentType='text/plain'
+        )
+        events.record('uploaded', filename)
+        return response
+    except ClientError as e:
+        log.error(f"Error uploading {filename} to S3: {e}")
+        return None
+
+def is_same_content(record, s3_object, sha256, md5):
     """
-    Get metadata for a file in S3, including MD5 hash.
-    Returns None if file doesn't exist.
+    Decide whether freshly downloaded content matches the S3 copy.
+    The manifest's SHA-256 is trusted while the object still carries the ETag
+    we recorded with it, which holds for single-part and multipart uploads
+    alike. Objects without a record fall back to ETag == MD5, which is only
+    true for single-part uploads.
     """
+    if not s3_object:
+        return False
+    if record and record.get('sha256') and record.get('s3_etag') == s3_object['etag']:
+        return record['sha256'] == sha256
+    return s3_object['etag'] == md5
+
+def stream_file_to_s3(filename, record=None, s3_object=None, on_replace=None):
+    """
+    Stream a file from BLS into S3 without holding it in memory.
+    The body is hashed as it arrives and sent as multipart upload parts of
+    MULTIPART_CHUNK_SIZE; files smaller than one part use a single put_object.
+    `record` is the file's manifest entry and `s3_object` its S3 inventory
+    entry; if the finished hash shows the content is unchanged the upload is
+    aborted. `on_replace(s3_key)` is called right before an existing object
+    is overwritten. Returns the stats counter to increment and the manifest record
+    to keep for the file (None if nothing should be recorded).
+    """
+    url = urljoin(BLS_BASE_URL, filename)
     clean_filename = filename.lstrip('/')
     s3_key = f"{S3_PREFIX}{clean_filename}"
+    
+    get_rate_limiter(url).acquire()
+    waited = time.perf_counter()  # Time blocked on BLS counts as download time
+    # When BLS content is confirmed unchanged, it is known current as of the request
+    requested_at = datetime.now(timezone.utc).isoformat()
+    with bls_session.get(url, headers=build_download_headers(record), timeout=30, stream=True) as response:
+        if response.status_code == 304:
+            metrics.add_time('download', time.perf_counter() - waited)
+            metrics.count('not_modified')
+            events.record('skipped_not_modified', filename)
+            return 'skipped', dict(record, verified_at=requested_at)
+        response.raise_for_status()
+        new_record = get_response_validators(response)
+        new_record['source_url'] = url
+        
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256()
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                metrics.add_time('download', time.perf_counter() - waited)
+                size += len(chunk)
+                with metrics.phase('hash'):
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                buffer.extend(chunk)
+                if len(buffer) >= MULTIPART_CHUNK_SIZE:
+                    with _s3_slots, metrics.phase('upload'):
+                        if upload_id is None:
+                            upload_id = s3_client.create_multipart_upload(
+                                Bucket=S3_BUCKET_NAME, Key=s3_key, ContentType='text/plain'
+                            )['UploadId']
+                        part = s3_client.upload_part(
+                            Bucket=S3_BUCKET_NAME, Key=s3_key, UploadId=upload_id,
+                            PartNumber=len(parts) + 1, Body=bytes(buffer)
+                        )
+                    parts.append({'PartNumber': len(parts) + 1, 'ETag': part['ETag']})
+                    buffer = bytearray()
+                waited = time.perf_counter()
+            new_record['sha256'] = sha256.hexdigest()
+            new_record['size'] = size
+            metrics.count('bytes_downloaded', size)
+            
+            with _s3_slots:
+                if is_same_content(record, s3_object, new_record['sha256'], md5.hexdigest()):
+                    # File exists and is identical - skip
+                    if upload_id is not None:
+                        s3_client.abort_multipart_upload(
+                            Bucket=S3_BUCKET_NAME, Key=s3_key, UploadId=upload_id
+                        )
+                    events.record('skipped_same_content', filename)
+                    previous = record or {}
+                    new_record['s3_etag'] = s3_object['etag']
+                    new_record['s3_version_id'] = previous.get('s3_version_id')
+                    new_record['uploaded_at'] = previous.get('uploaded_at') or s3_object['last_modified'].isoformat()
+                    new_record['verified_at'] = requested_at
+                    return 'skipped', new_record
+
+                # File is new or updated - finish the upload
+                if s3_object and on_replace:
+                    with metrics.phase('snapshot'):
+                        on_replace(s3_key)
+                with metrics.phase('upload'):
+                    if upload_id is None:
+                        response = upload_to_s3(filename, bytes(buffer))
+                        if not response:
+                            return 'errors', None
+                    else:
+                        if buffer:
+                            part = s3_client.upload_part(
+                                Bucket=S3_BUCKET_NAME, Key=s3_key, UploadId=upload_id,
+                                PartNumber=len(parts) + 1, Body=bytes(buffer)
+                            )
+                            parts.append({'PartNumber': len(parts) + 1, 'ETag': part['ETag']})
+                        response = s3_client.complete_multipart_upload(
+                            Bucket=S3_BUCKET_NAME, Key=s3_key, UploadId=upload_id,
+                            MultipartUpload={'Parts': parts}
+                        )
+                        events.record('uploaded', filename, parts=len(parts))
+                metrics.count('bytes_uploaded', size)
+                new_record['s3_etag'] = response['ETag'].strip('"')
+                new_record['s3_version_id'] = response.get('VersionId')
+                new_record['uploaded_at'] = datetime.now(timezone.utc).isoformat()
+                return 'uploaded', new_record
+        
+        except Exception:
+            # Never leave billable orphaned parts behind
+            if upload_id is not None:
+                s3_client.abort_multipart_upload(
+                    Bucket=S3_BUCKET_NAME, Key=s3_key, UploadId=upload_id
+                )
+            raise
+
+def get_s3_inventory():
+    """
+    List every object under the prefix, following pagination.
+    Returns {filename: {'etag', 'size', 'last_modified'}}, skipping sync state.
+    """
+    inventory = {}
     try:
-        response = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
-        # S3 ETag is MD5 for non-multipart uploads
-        etag = response['ETag'].strip('"')
-        return {
-            'etag': etag,
-            'last_modified': response['LastModified'],
-            'size': response['ContentLength']
-        }
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=S3_PREFIX):
+            for obj in page.get('Contents', []):
+                filename = obj['Key'][len(S3_PREFIX):]
+                # Ignore the prefix itself if it's a "folder" and internal sync state
+                if filename and not filename.startswith('_'):
+                    inventory[filename] = {
+                        'etag': obj['ETag'].strip('"'),
+                        'size': obj['Size'],
+                        'last_modified': obj['LastModified']
+                    }
+        return inventory
     except ClientError as e:
-        if e.response['Error']['Code'] == '404':
-            return None
-        raise
+        log.error(f"Error listing S3 files: {e}")
+        return {}
 
-def download_file_from_bls(filename):
-    """Download a file from BLS website"""
-    url = urljoin(BLS_BASE_URL, filename)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (compatible; RearcDataQuest/1.0; +https://rearc.io)',
+def listed_before(entry, moment):
+    """True when the listing date shows the file changed on BLS strictly before `moment`"""
+    return entry['mtime'] + BLS_LISTING_PRECISION < moment
+
+def is_unchanged_per_manifest(entry, record):
+    """True when the BLS listing still shows the size and date recorded for the file"""
+    if not record or entry['size'] is None or entry['mtime'] is None:
+        return False
+    return entry['size'] == record.get('size') and entry['mtime'].isoformat() == record.get('mtime')
+
+def with_listing_date(record, entry):
+    """
+    Copy of a manifest record carrying the file's current listing date.
+    The date is recorded once the copy is known current past it: uploaded,
+    or confirmed unchanged (`verified_at`) by a 304 or a matching hash. A
+    listed minute that overlaps both is not recorded, so the file is checked
+    with a conditional request until the date moves.
+    """
+    record = dict(record)
+    record.pop('mtime', None)
+    current_as_of = [
+        datetime.fromisoformat(record[field]) for field in ('uploaded_at', 'verified_at') if record.get(field)
+    ]
+    if entry['mtime'] is not None and current_as_of and listed_before(entry, max(current_as_of)):
+        record['mtime'] = entry['mtime'].isoformat()
+    return record
+
+def inventory_record(entry, s3_object):
+    """
+    Manifest record for an object known only from the S3 listing. It has no
+    content hash or validators yet; those are filled in when the file is
+    next downloaded.
+    """
+    record = {
+        'source_url': urljoin(BLS_BASE_URL, entry['name']),
+        'size': s3_object['size'],
+        's3_etag': s3_object['etag'],
+        'uploaded_at': s3_object['last_modified'].isoformat()
     }
+    return with_listing_date(record, entry)
+
+def manifest_s3_object(record):
+    """Describe the S3 copy of a file from its manifest record, in inventory form"""
+    if not record or not record.get('s3_etag'):
+        return None
+    return {
+        'etag': record['s3_etag'],
+        'size': record.get('size'),
+        'last_modified': datetime.fromisoformat(record['uploaded_at'])
+    }
+
+def is_unchanged_per_listing(entry, s3_object):
+    """
+    True when the BLS listing shows the same size as the S3 copy and the
+    file was last modified on BLS before the S3 copy was written. Copies
+    written within the listed minute prove nothing: a same-size revision
+    may have landed later in that minute.
+    """
+    if not s3_object or entry['size'] is None or entry['mtime'] is None:
+        return False
+    return entry['size'] == s3_object['size'] and listed_before(entry, s3_object['last_modified'])
+
+def delete_many_from_s3(filenames):
+    """
+    Delete files from S3 in DeleteObjects batches of up to DELETE_BATCH_SIZE keys.
+    Returns the number deleted and the list of filenames that failed.
+    """
+    keys = [f"{S3_PREFIX}{filename.lstrip('/')}" for filename in filenames]
+    deleted = 0
+    failed = []
+    
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start:start + DELETE_BATCH_SIZE]
+        try:
+            response = s3_client.delete_objects(
+                Bucket=S3_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+        except ClientError as e:
+            log.error(f"Error deleting {len(batch)} files from S3: {e}")
+            failed.extend(key[len(S3_PREFIX):] for key in batch)
+            continue
+        
+        # Quiet mode only reports the keys that failed
+        errors = response.get('Errors', [])
+        for error in errors:
+            log.error(f"Error deleting {error['Key']} from S3: {error.get('Code')} {error.get('Message')}")
+            failed.append(error['Key'][len(S3_PREFIX):])
+        deleted += len(batch) - len(errors)
     
+    if deleted:
+        log.info(f"Deleted {deleted} files from S3 (no longer exist on source)")
+    return deleted, failed
+
+def load_manifest():
+    """
+    Load the sync manifest from S3.
+    Maps each synced filename to a record of:
+      source_url, size, mtime     - where it came from and its BLS listing entry
+      etag, last_modified         - HTTP validators for conditional requests
+      sha256                      - content fingerprint
+      s3_etag, s3_version_id      - the S3 object holding that content
+      uploaded_at                 - when that object was written
+      verified_at                 - when BLS last confirmed the content unchanged
+    Returns {} if none exists yet.
+    """
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.content
-    except requests.RequestException as e:
-        print(f"ERROR: Error downloading {filename}: {e}")
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=MANIFEST_KEY)
+        return json.loads(response['Body'].read()).get('files', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return {}
         raise
 
-def upload_to_s3(filename, content):
-    """Upload file content to S3"""
-    # Clean filename to avoid double paths
+def is_series_file(filename):
+    """True for the tab-separated pr.data.* time-series files"""
+    return filename.rsplit('/', 1)[-1].startswith('pr.data.')
+
+def read_s3_lines(location):
+    """Yield the decoded lines of an S3 object given as get_object arguments"""
+    response = s3_client.get_object(Bucket=S3_BUCKET_NAME, **location)
+    for line in response['Body'].iter_lines():
+        yield line.decode('utf-8')
+
+def delete_parquet_objects(dataset_prefix, keep=()):
+    """Delete the Parquet objects under `dataset_prefix` except the keys in `keep`"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    stale = [
+        obj['Key']
+        for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=dataset_prefix)
+        for obj in page.get('Contents', [])
+        if obj['Key'] not in keep
+    ]
+    for start in range(0, len(stale), DELETE_BATCH_SIZE):
+        s3_client.delete_objects(
+            Bucket=S3_BUCKET_NAME,
+            Delete={'Objects': [{'Key': key} for key in stale[start:start + DELETE_BATCH_SIZE]], 'Quiet': True}
+        )
+
+def export_series_to_parquet(filename, deleted=False):
+    """
+    Write a synced series file as Parquet under PARQUET_PREFIX, one
+    year=YYYY partition per year, and drop partitions for years that are no
+    longer present. With `deleted`, remove the file's Parquet copy instead.
+    Returns True on success.
+    """
     clean_filename = filename.lstrip('/')
-    s3_key = f"{S3_PREFIX}{clean_filename}"
+    dataset_prefix = f"{PARQUET_PREFIX}{clean_filename.rsplit('/', 1)[-1]}/"
     
+    try:
+        if deleted:
+            delete_parquet_objects(dataset_prefix)
+            return True
+        
+        # Partitions are written to /tmp as the file streams in, then uploaded
+        written = set()
+        with tempfile.TemporaryDirectory(prefix='parquet_') as directory:
+            partitions = write_series_partitions(read_s3_lines({'Key': f"{S3_PREFIX}{clean_filename}"}), directory)
+            for year, path in sorted(partitions.items()):
+                s3_key = f"{dataset_prefix}year={year}/part-0.parquet"
+                s3_client.upload_file(
+                    path, S3_BUCKET_NAME, s3_key,
+                    ExtraArgs={'ContentType': 'application/vnd.apache.parquet'}
+                )
+                written.add(s3_key)
+        delete_parquet_objects(dataset_prefix, keep=written)
+        events.record('parquet_exported', filename, years=len(written))
+        return True
+    except Exception as e:
+        log.error(f"Error exporting {filename} to Parquet: {e}")
+        return False
+
+def update_best_year_aggregate(change):
+    """
+    Bring the stored best-year aggregate up to date with a change to
+    BEST_YEAR_SOURCE. Row changes are applied when the stored aggregate
+    describes the previous version of the file; otherwise it is rebuilt
+    from the new file. Returns True on success.
+    """
+    try:
+        aggregate = None
+        try:
+            response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=BEST_YEAR_AGGREGATE_KEY)
+            aggregate = BestYearAggregate.from_json(response['Body'].read())
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+        
+        if aggregate and change.get('rows_key') and aggregate.source_sha256 == change['old_sha256']:
+            aggregate.apply_row_changes(
+                read_row_changes(read_s3_lines({'Key': change['rows_key']})), source_sha256=change['new_sha256']
+            )
+            log.info("Applied row changes to best-year aggregate")
+        else:
+            aggregate = BestYearAggregate.from_lines(
+                read_s3_lines({'Key': change['key']}), source_sha256=change['new_sha256']
+            )
+            log.info(f"Rebuilt best-year aggregate from {change['key']}")
+        
+        s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=BEST_YEAR_AGGREGATE_KEY,
+            Body=aggregate.to_json().encode('utf-8'),
+            ContentType='application/json'
+        )
+        return True
+    except Exception as e:
+        log.error(f"Error updating best-year aggregate: {e}")
+        return False
+
+def write_change_feed(run_id, changes):
+    """
+    Write this run's change record to CHANGES_PREFIX.
+    `changes` holds 'added', 'modified' and 'deleted' lists of file changes.
+    Returns the S3 key written, or None on failure.
+    """
+    s3_key = f"{CHANGES_PREFIX}{run_id}.json"
     try:
         s3_client.put_object(
             Bucket=S3_BUCKET_NAME,
             Key=s3_key,
-            Body=content,
-            ContentType='text/plain'
+            Body=json.dumps(dict(changes, run_id=run_id)).encode('utf-8'),
+            ContentType='application/json'
+        )
+        log.info(f"Wrote change feed to s3://{S3_BUCKET_NAME}/{s3_key}")
+        return s3_key
+    except ClientError as e:
+        log.error(f"Error writing change feed: {e}")
+        return None
+
+def save_manifest(manifest):
+    """Write the sync manifest back to S3"""
+    try:
+        s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=MANIFEST_KEY,
+            Body=json.dumps({
+                'version': 2,
+                'updated_at': datetime.now(timezone.utc).isoformat(),
+                'files': manifest
+            }, sort_keys=True).encode('utf-8'),
+            ContentType='application/json'
         )
-        print(f"INFO: Uploaded {filename} to s3://{S3_BUCKET_NAME}/{s3_key}")
         return True
     except ClientError as e:
-        print(f"ERROR: Error uploading {filename} to S3: {e}")
+        log.error(f"Error saving sync manifest: {e}")
         return False
 
-def get_existing_s3_files():
-    """Get list of files currently in S3 bucket with the prefix"""
+def load_checkpoint():
+    """
+    Load the checkpoint left by a sync that stopped before its deadline:
+      run_id      - the run that started the interrupted sync
+      completed   - files already processed; the resuming run skips them
+      pending     - files that were still to do
+    Returns None when the last sync ran to completion.
+    """
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=CHECKPOINT_KEY)
+        return json.loads(response['Body'].read())
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+def save_checkpoint(run_id, completed, pending):
+    """Record the progress of a sync that is stopping before its deadline"""
     try:
-        response = s3_client.list_objects_v2(
+        s3_client.put_object(
             Bucket=S3_BUCKET_NAME,
-            Prefix=S3_PREFIX
+            Key=CHECKPOINT_KEY,
+            Body=json.dumps({
+                'run_id': run_id,
+                'updated_at': datetime.now(timezone.utc).isoformat(),
+                'completed': sorted(completed),
+                'pending': sorted(pending)
+            }).encode('utf-8'),
+            ContentType='application/json'
         )
-        
-        if 'Contents' not in response:
-            return set()
-        
-        # Extract just the filenames (remove prefix)
-        files = set()
-        for obj in response['Contents']:
-            key = obj['Key']
-            if key.startswith(S3_PREFIX):
-                filename = key[len(S3_PREFIX):]
-                if filename:  # Ignore the prefix itself if it's a "folder"
-                    files.add(filename)
-        
-        return files
+        return True
     except ClientError as e:
-        print(f"ERROR: Error listing S3 files: {e}")
-        return set()
+        log.error(f"Error saving sync checkpoint: {e}")
+        return False
 
-def delete_from_s3(filename):
-    """Delete a file from S3"""
+def clear_checkpoint():
+    """Remove the checkpoint once a resumed sync has finished"""
+    try:
+        s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=CHECKPOINT_KEY)
+    except ClientError as e:
+        log.error(f"Error removing sync checkpoint: {e}")
+
+def write_row_diff(previous_location, current_location, rows_key):
+    """
+    Stream the row changes between two versions of a series file, given as
+    get_object arguments, to `rows_key` as NDJSON. The lines are spooled
+    through a file in /tmp, so memory stays flat however many rows changed.
+    Raises TooManyChangesError past ROW_DIFF_MAX_CHANGES.
+    Returns the number of inserted, updated and deleted rows.
+    """
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.ndjson') as spool:
+        counts = write_row_changes(
+            iter_row_changes(read_s3_lines(previous_location), read_s3_lines(current_location)),
+            spool, max_changes=ROW_DIFF_MAX_CHANGES
+        )
+        spool.flush()
+        s3_client.upload_file(
+            spool.name, S3_BUCKET_NAME, rows_key,
+            ExtraArgs={'ContentType': 'application/x-ndjson'}
+        )
+    return counts
+
+def process_file(filename, record=None, s3_object=None, stop=None, rows_prefix=None):
+    """
+    Stream a single BLS file to S3 if it is new or changed.
+    `record` is the file's manifest entry and `s3_object` its entry from the
+    S3 inventory, if any. Returns the name of the stats counter to increment,
+    the manifest record to keep (None if nothing should be recorded) and the
+    file's change feed entry (None if it did not change). If the `stop` event
+    is set by the time a BLS slot frees up, the file is not started and comes
+    back as 'pending'. Row diffs of replaced series files are written under
+    `rows_prefix`.
+    """
     clean_filename = filename.lstrip('/')
-    s3_key = f"{S3_PREFIX}{clean_filename}"
+    previous = {}
+    
+    def keep_previous_copy(s3_key):
+        # Versioned buckets keep the old object; otherwise snapshot it server-side
+        if record and record.get('s3_version_id'):
+            previous['location'] = {'Key': s3_key, 'VersionId': record['s3_version_id']}
+        else:
+            snapshot_key = f"{SNAPSHOT_PREFIX}{clean_filename}"
+            s3_client.copy_object(
+                Bucket=S3_BUCKET_NAME,
+                Key=snapshot_key,
+                CopySource={'Bucket': S3_BUCKET_NAME, 'Key': s3_key}
+            )
+            previous['location'] = {'Key': snapshot_key}
+            previous['snapshot'] = True
     
+    started = time.perf_counter()
     try:
-        s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
-        print(f"INFO: Deleted {filename} from S3 (no longer exists on source)")
-        return True
-    except ClientError as e:
-        print(f"ERROR: Error deleting {filename} from S3: {e}")
-        return False
+        with _bls_slots:
+            if stop is not None and stop.is_set():
+                return 'pending', None, None
+            outcome, new_record = stream_file_to_s3(
+                filename, record, s3_object,
+                on_replace=keep_previous_copy if is_series_file(filename) else None
+            )
+    
+    except Exception as e:
+        log.error(f"Error processing {filename}: {e}")
+        return 'errors', None, None
+    finally:
+        metrics.observe('file', (time.perf_counter() - started) * 1000)
+    
+    if outcome != 'uploaded':
+        return outcome, new_record, None
+    
+    change = {
+        'key': f"{S3_PREFIX}{clean_filename}",
+        'old_sha256': (record or {}).get('sha256'),
+        'new_sha256': new_record['sha256']
+    }
+    if 'location' in previous:
+        current = {'Key': change['key']}
+        if new_record.get('s3_version_id'):
+            current['VersionId'] = new_record['s3_version_id']
+        rows_key = f"{rows_prefix}{clean_filename}.ndjson"
+        change['rows_key'] = None
+        try:
+            if rows_prefix:
+                with _s3_slots, metrics.phase('diff'):
+                    change['row_counts'] = write_row_diff(previous['location'], current, rows_key)
+                change['rows_key'] = rows_key
+        except TooManyChangesError as e:
+            log.info(f"No row diff for {filename}: {e}")
+        except Exception as e:
+            log.error(f"Error diffing rows of {filename}: {e}")
+        finally:
+            if previous.get('snapshot'):
+                s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=previous['location']['Key'])
+    return outcome, new_record, change
+
+def process_files(jobs, remaining_time_ms=None, rows_prefix=None):
+    """
+    Run process_file over `jobs`, (filename, record, s3_object) tuples, with
+    BLS_MAX_WORKERS + S3_MAX_WORKERS threads. Once `remaining_time_ms()` is
+    below SYNC_TIME_RESERVE_MS the files holding a BLS slot finish and no
+    more start: queued ones are cancelled, and threads still waiting for a
+    slot give up on theirs. Row diffs are written under `rows_prefix`.
+    Returns the (filename, outcome, record, change) of every processed file
+    and the names of the files that were not started.
+    """
+    results, pending = [], []
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=BLS_MAX_WORKERS + S3_MAX_WORKERS) as executor:
+        futures = {executor.submit(process_file, *job, stop=stop, rows_prefix=rows_prefix): job[0] for job in jobs}
+        for future in as_completed(futures):
+            if future.cancelled():
+                pending.append(futures[future])
+                continue
+            outcome, record, change = future.result()
+            if outcome == 'pending':
+                pending.append(futures[future])
+                continue
+            results.append((futures[future], outcome, record, change))
+            if remaining_time_ms and not stop.is_set() and remaining_time_ms() < SYNC_TIME_RESERVE_MS:
+                stop.set()
+                unfinished = [other for other in futures if not other.done()]
+                for other in unfinished:
+                    other.cancel()
+                if unfinished:
+                    log.warning(
+                        f"Less than {SYNC_TIME_RESERVE_MS} ms left; starting no more of the {len(unfinished)} unfinished files",
+                        extra=fields(remaining_ms=remaining_time_ms(), unfinished=len(unfinished))
+                    )
+    return results, pending
+
+def shard_jobs(jobs, shard_count):
+    """
+    Split (entry, record, s3_object) jobs into at most `shard_count` shards
+    of similar total size: largest file first, each to the shard with the
+    fewest bytes so far. Files the listing gives no size for count as average.
+    """
+    sizes = [entry['size'] for entry, _, _ in jobs if entry['size'] is not None]
+    average = sum(sizes) // len(sizes) if sizes else 0
+    shards = [[] for _ in range(min(shard_count, len(jobs)))]
+    totals = [(0, index) for index in range(len(shards))]
+    for job in sorted(jobs, key=lambda job: job[0]['size'] if job[0]['size'] is not None else average, reverse=True):
+        total, index = heapq.heappop(totals)
+        shards[index].append(job)
+        size = job[0]['size'] if job[0]['size'] is not None else average
+        heapq.heappush(totals, (total + size, index))
+    return shards
+
+def build_shard_event(run_id, jobs, rows_prefix, deadline_ms=None, requests_per_second=None):
+    """The event that hands one shard of (entry, record, s3_object) jobs to a worker"""
+    files = []
+    for entry, record, s3_object in jobs:
+        if s3_object:
+            s3_object = dict(s3_object, last_modified=s3_object['last_modified'].isoformat())
+        files.append({'name': entry['name'], 'record': record, 's3_object': s3_object})
+    return {'shard': {
+        'run_id': run_id,
+        'rows_prefix': rows_prefix,
+        'deadline_ms': deadline_ms,
+        'requests_per_second': requests_per_second,
+        'files': files
+    }}
+
+def sync_shard(shard, remaining_time_ms=None):
+    """
+    Worker side of a fan-out: process the files of one shard event.
+    The worker writes file objects only; the coordinator records the results
+    in the manifest, so workers never race on it. Stops early at the
+    coordinator's deadline or at `remaining_time_ms`, whichever comes first.
+    Returns {'results': [[filename, outcome, record, change]], 'pending': [filenames]}.
+    """
+    jobs = []
+    for file in shard['files']:
+        s3_object = file['s3_object']
+        if s3_object:
+            s3_object = dict(s3_object, last_modified=datetime.fromisoformat(s3_object['last_modified']))
+        jobs.append((file['name'], file['record'], s3_object))
+    
+    deadline_ms = shard.get('deadline_ms')
+    
+    def time_left():
+        left = [deadline_ms - time.time() * 1000] if deadline_ms else []
+        if remaining_time_ms:
+            left.append(remaining_time_ms())
+        return min(left)
+    
+    results, pending = process_files(
+        jobs, time_left if deadline_ms or remaining_time_ms else None, rows_prefix=shard['rows_prefix']
+    )
+    return {'results': [list(result) for result in results], 'pending': pending}
+
+def save_shard_result(run_id, result):
+    """
+    Store a worker's result for the coordinator. Row diffs can outgrow the
+    6 MB limit on Lambda responses, so results travel through S3.
+    Returns the S3 key written.
+    """
+    s3_key = f"{SHARD_RESULTS_PREFIX}{run_id}.json"
+    s3_client.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=s3_key,
+        Body=json.dumps(result).encode('utf-8'),
+        ContentType='application/json'
+    )
+    return s3_key
+
+def load_shard_result(s3_key):
+    """Read a worker's result and remove it from S3"""
+    response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+    result = json.loads(response['Body'].read())
+    s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+    return result
+
+def invoke_worker(function_name):
+    """Dispatcher running each shard as a synchronous invocation of `function_name`"""
+    def dispatch(event):
+        response = get_lambda_client().invoke(
+            FunctionName=function_name,
+            InvocationType='RequestResponse',
+            Payload=json.dumps(event).encode('utf-8')
+        )
+        payload = json.loads(response['Payload'].read())
+        if response.get('FunctionError') or payload.get('statusCode') != 200:
+            raise RuntimeError(f"Worker failed: {payload}")
+        return load_shard_result(json.loads(payload['body'])['result_key'])
+    return dispatch
+
+def run_worker_locally(event):
+    """
+    Dispatcher running a shard in this process instead of invoking a worker,
+    for tests and benchmarks. The event and result go through JSON as they
+    would in a Lambda payload.
+    """
+    shard = json.loads(json.dumps(event))['shard']
+    return json.loads(json.dumps(sync_shard(shard)))
+
+def fan_out(jobs, dispatch, run_id, rows_prefix, remaining_time_ms=None):
+    """
+    Process (entry, record, s3_object) jobs in SYNC_FAN_OUT_WORKERS shards,
+    all dispatched at once. The BLS request rate is divided between them.
+    Returns results and pending files as process_files does; every file of a
+    shard whose worker failed counts as an error.
+    """
+    shards = shard_jobs(jobs, SYNC_FAN_OUT_WORKERS)
+    deadline_ms = time.time() * 1000 + remaining_time_ms() if remaining_time_ms else None
+    log.info(
+        f"Fanning out {len(jobs)} files to {len(shards)} workers",
+        extra=fields(files=len(jobs), shard_files=[len(shard) for shard in shards])
+    )
+    metrics.count('shards', len(shards))
+    
+    results, pending = [], []
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        futures = {
+            executor.submit(dispatch, build_shard_event(
+                f"{run_id}-{index}", shard, rows_prefix, deadline_ms, BLS_REQUESTS_PER_SECOND / len(shards)
+            )): shard
+            for index, shard in enumerate(shards)
+        }
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                log.error(f"Worker for {len(futures[future])} files failed: {e}")
+                results.extend((entry['name'], 'errors', None, None) for entry, _, _ in futures[future])
+                continue
+            results.extend(tuple(result) for result in response['results'])
+            pending.extend(response['pending'])
+    return results, pending
+
+def new_run_id():
+    """
+    Unique, time-sortable run ID such as 20250128T133000123Z-1a2b3c4d.
+    It names the change feed, so runs started in the same second must not collide.
+    """
+    now = datetime.now(timezone.utc)
+    return f"{now:%Y%m%dT%H%M%S}{now.microsecond // 1000:03d}Z-{uuid.uuid4().hex[:8]}"
+
+def start_run(run_id):
+    """Fresh metrics and event counts for a run, and its ID on every log record"""
+    global metrics, events
+    metrics = SyncMetrics('bls_sync')
+    events = EventSummary(log)
+    set_context(run_id=run_id)
 
-def sync_bls_to_s3():
+def sync_bls_to_s3(reconcile=SYNC_RECONCILE, remaining_time_ms=None, dispatch=None):
     """
     Main sync function:
-    1. Get list of files from BLS website
-    2. Get list of files in S3
-    3. Upload new/updated files
-    4. Delete files that no longer exist on source
+    1. Get list of files (with size and date) from BLS website
+    2. Load the sync manifest; list the files in S3 only when reconciling
+       (requested, or no manifest exists yet)
+    3. Skip files whose listing size/date show they are unchanged
+    4. Upload new/updated files (BLS_MAX_WORKERS downloads and
+       S3_MAX_WORKERS S3 calls in flight at once)
+    5. Delete files that no longer exist on source
+    6. Save the updated manifest, export changed series files to Parquet
+       (if enabled), update the best-year aggregate and write the run's
+       change feed
+    
+    `remaining_time_ms` (e.g. the Lambda context's get_remaining_time_in_millis)
+    is checked as files complete. Once it drops below SYNC_TIME_RESERVE_MS no
+    more files are started, the run finishes what it has and checkpoints, and
+    the stats come back with status 'partial'. The next run skips the
+    checkpointed files, so a long backfill makes progress on every invocation.
+    
+    With a `dispatch` callable (invoke_worker or run_worker_locally) and
+    SYNC_FAN_OUT_WORKERS above one, step 4 is spread over that many workers.
     """
-    print(f"INFO: Starting BLS data sync to s3://{S3_BUCKET_NAME}/{S3_PREFIX}")
+    run_id = new_run_id()
+    start_run(run_id)
+    log.info(f"Starting BLS data sync to s3://{S3_BUCKET_NAME}/{S3_PREFIX}")
     
     # Get source files
-    source_files = get_file_list_from_bls()
-    source_files_set = set(source_files)
+    source_entries = get_file_list_from_bls()
+    source_files_set = {entry['name'].lstrip('/') for entry in source_entries}
     
-    # Get existing S3 files
-    s3_files = get_existing_s3_files()
+    # The manifest says what is in S3; the bucket itself is only listed to reconcile
+    with metrics.phase('manifest'):
+        manifest = load_manifest()
+    previous_manifest = dict(manifest)
+    reconciling = reconcile or not manifest
+    if reconciling:
+        log.info("Reconciling manifest against S3 listing")
+        with metrics.phase('inventory'):
+            s3_inventory = get_s3_inventory()
+    else:
+        s3_inventory = {
+            filename: manifest_s3_object(record)
+            for filename, record in manifest.items()
+            if manifest_s3_object(record)
+        }
+    s3_files = set(s3_inventory)
+    
+    # Resume a sync that an earlier run had to stop short
+    with metrics.phase('manifest'):
+        checkpoint = load_checkpoint()
+    done_earlier = set(checkpoint['completed']) if checkpoint else set()
+    if checkpoint:
+        log.info(
+            f"Resuming sync started by run {checkpoint['run_id']}: "
+            f"{len(done_earlier)} files already done",
+            extra=fields(resumed_run_id=checkpoint['run_id'], completed=len(done_earlier))
+        )
     
     # Track statistics
     stats = {
@@ -177,59 +1013,155 @@ def sync_bls_to_s3():
         'deleted': 0,
         'errors': 0
     }
+    changes = {'added': [], 'modified': [], 'deleted': []}
+    completed = set()
     
-    # Process each source file
-    for filename in source_files:
-        try:
-            # Download file content
-            content = download_file_from_bls(filename)
-            content_md5 = calculate_md5(content)
-            
-            # Check if file exists in S3 and compare
-            s3_metadata = get_s3_file_metadata(filename)
-            
-            if s3_metadata and s3_metadata['etag'] == content_md5:
-                # File exists and is identical - skip
-                print(f"INFO: Skipping {filename} (already up to date)")
-                stats['skipped'] += 1
-            else:
-                # File is new or updated - upload
-                if upload_to_s3(filename, content):
-                    stats['uploaded'] += 1
-                else:
-                    stats['errors'] += 1
-            
-            # Small delay to be respectful to BLS servers
-            time.sleep(0.1)
-            
-        except Exception as e:
-            print(f"ERROR: Error processing {filename}: {e}")
-            stats['errors'] += 1
+    # Decide which files need a request. Records are only trusted while they
+    # describe the object actually in S3.
+    jobs = []
+    for entry in source_entries:
+        filename = entry['name']
+        clean_filename = filename.lstrip('/')
+        s3_object = s3_inventory.get(clean_filename)
+        record = manifest.get(clean_filename)
+        if clean_filename in done_earlier:
+            events.record('skipped_checkpointed', filename)
+            stats['skipped'] += 1
+            continue
+        if not s3_object or (record and record.get('s3_etag') != s3_object['etag']):
+            record = None
+        # Size and date from the listing settle most files without a request
+        if is_unchanged_per_manifest(entry, record) or is_unchanged_per_listing(entry, s3_object):
+            events.record('skipped_per_listing', filename)
+            metrics.count('skipped_by_listing')
+            stats['skipped'] += 1
+            continue
+        jobs.append((entry, record, s3_object))
+    
+    # Process them here or on fan-out workers; each file reports one outcome
+    rows_prefix = f"{CHANGES_PREFIX}{run_id}/"
+    if dispatch and SYNC_FAN_OUT_WORKERS > 1 and len(jobs) > 1:
+        with metrics.phase('fan_out'):
+            results, pending = fan_out(jobs, dispatch, run_id, rows_prefix, remaining_time_ms)
+    else:
+        results, pending = process_files(
+            [(entry['name'], record, s3_object) for entry, record, s3_object in jobs],
+            remaining_time_ms, rows_prefix=rows_prefix
+        )
+    entries = {entry['name']: entry for entry, _, _ in jobs}
+    for filename, outcome, record, change in results:
+        clean_filename = filename.lstrip('/')
+        stats[outcome] += 1
+        if outcome != 'errors':
+            completed.add(clean_filename)
+        if change:
+            changes['modified' if clean_filename in s3_files else 'added'].append(change)
+        if record:
+            # A 304 keeps the old record; refresh the listing fields either way
+            manifest[clean_filename] = with_listing_date(record, entries[filename])
+    pending = {filename.lstrip('/') for filename in pending}
+    
+    # Reconciling makes the manifest a complete view of the bucket again:
+    # objects that were skipped, failed or left pending get a record from
+    # the listing, so the next run neither re-uploads them as new nor misses them
+    if reconciling:
+        for entry in source_entries:
+            clean_filename = entry['name'].lstrip('/')
+            s3_object = s3_inventory.get(clean_filename)
+            if s3_object and manifest.get(clean_filename, {}).get('s3_etag') != s3_object['etag']:
+                manifest[clean_filename] = inventory_record(entry, s3_object)
     
     # Delete files that no longer exist on source
     files_to_delete = s3_files - source_files_set
-    for filename in files_to_delete:
-        if delete_from_s3(filename):
-            stats['deleted'] += 1
-        else:
-            stats['errors'] += 1
+    failed_deletes = []
+    if files_to_delete:
+        with metrics.phase('delete'):
+            deleted, failed_deletes = delete_many_from_s3(sorted(files_to_delete))
+        stats['deleted'] += deleted
+        stats['errors'] += len(failed_deletes)
+        changes['deleted'] = [
+            {'key': f"{S3_PREFIX}{filename}", 'old_sha256': manifest.get(filename, {}).get('sha256')}
+            for filename in sorted(files_to_delete - set(failed_deletes))
+        ]
+    
+    # Forget files that are gone (keeping failed deletes for a retry), then persist
+    for filename in set(manifest) - source_files_set - set(failed_deletes):
+        del manifest[filename]
+    if manifest != previous_manifest:
+        with metrics.phase('manifest'):
+            save_manifest(manifest)
+    
+    # Optional columnar copies of the series files that changed
+    if PARQUET_EXPORT and not pyarrow_available():
+        log.warning("PARQUET_EXPORT is set but pyarrow is not installed; skipping export")
+    elif PARQUET_EXPORT:
+        for change in changes['added'] + changes['modified'] + changes['deleted']:
+            filename = change['key'][len(S3_PREFIX):]
+            if is_series_file(filename):
+                deleted = change in changes['deleted']
+                with metrics.phase('parquet'):
+                    if not export_series_to_parquet(filename, deleted=deleted):
+                        stats['errors'] += 1
+    for change in changes['added'] + changes['modified']:
+        if change['key'] == f"{S3_PREFIX}{BEST_YEAR_SOURCE}":
+            with metrics.phase('aggregate'):
+                if not update_best_year_aggregate(change):
+                    stats['errors'] += 1
+    if any(changes.values()):
+        with metrics.phase('change_feed'):
+            write_change_feed(run_id, changes)
     
-    # Print summary
-    print("\n" + "="*50)
-    print("Sync Summary:")
-    print(f"  Files uploaded: {stats['uploaded']}")
-    print(f"  Files skipped (up to date): {stats['skipped']}")
-    print(f"  Files deleted: {stats['deleted']}")
-    print(f"  Errors: {stats['errors']}")
-    print("="*50)
+    # Leave a checkpoint for the next run, or drop the one this run finished
+    stats['status'] = 'partial' if pending else 'complete'
+    stats['pending'] = len(pending)
+    if pending:
+        with metrics.phase('manifest'):
+            if not save_checkpoint(checkpoint['run_id'] if checkpoint else run_id, done_earlier | completed, pending):
+                stats['errors'] += 1
+    elif checkpoint:
+        with metrics.phase('manifest'):
+            clear_checkpoint()
+    
+    # Log the per-file events as totals, then the summary
+    events.log()
+    log.info(
+        f"Sync summary: {stats['uploaded']} uploaded, {stats['skipped']} skipped, "
+        f"{stats['deleted']} deleted, {stats['errors']} errors, {stats['pending']} pending",
+        extra=fields(**stats)
+    )
+    metrics.emit()
     
     return stats
 
+def resume_sync(event, context):
+    """
+    Invoke this function again, asynchronously, to carry on from the checkpoint.
+    The event counts the resumes so a sync that never finishes stops at SYNC_MAX_RESUMES.
+    Returns True if the invocation was queued.
+    """
+    resumes = int(event.get('resumes', 0)) + 1
+    if resumes > SYNC_MAX_RESUMES:
+        log.warning(f"Not resuming: sync already resumed {SYNC_MAX_RESUMES} times")
+        return False
+    try:
+        get_lambda_client().invoke(
+            FunctionName=context.invoked_function_arn,
+            InvocationType='Event',
+            Payload=json.dumps(dict(event, resumes=resumes)).encode('utf-8')
+        )
+        log.info(f"Queued resume {resumes} of the sync", extra=fields(resumes=resumes))
+        return True
+    except ClientError as e:
+        log.error(f"Error invoking resume of the sync: {e}")
+        return False
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler function.
     Triggers the BLS to S3 sync process.
     """
+    clear_context()
+    set_context(request_id=getattr(context, 'aws_request_id', None))
     try:
         # Ensure bucket name is set
         if not os.environ.get("S3_BUCKET_NAME"):
@@ -240,20 +1172,55 @@ def lambda_handler(event, context):
                 })
             }
         
+        remaining_time_ms = getattr(context, 'get_remaining_time_in_millis', None)
+        # Workers share the BLS request rate; warm containers may have been either role
+        shard = event.get('shard')
+        get_rate_limiter(BLS_BASE_URL).set_rate((shard or {}).get('requests_per_second') or BLS_REQUESTS_PER_SECOND)
+        
+        # A fan-out worker: process the shard and report back to the coordinator
+        if shard:
+            start_run(shard['run_id'])
+            result = sync_shard(shard, remaining_time_ms=remaining_time_ms)
+            result_key = save_shard_result(shard['run_id'], result)
+            events.log()
+            metrics.emit()
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'result_key': result_key,
+                    'processed': len(result['results']),
+                    'pending': len(result['pending']),
+                    'metrics': metrics.summary()
+                })
+            }
+        
         # Run the sync
-        stats = sync_bls_to_s3()
+        dispatch = None
+        if SYNC_FAN_OUT_WORKERS > 1 and context is not None:
+            dispatch = invoke_worker(SYNC_WORKER_FUNCTION or context.invoked_function_arn)
+        stats = sync_bls_to_s3(
+            reconcile=bool(event.get('reconcile', SYNC_RECONCILE)),
+            remaining_time_ms=remaining_time_ms,
+            dispatch=dispatch
+        )
+        if stats['status'] == 'partial' and SYNC_SELF_INVOKE:
+            stats['resumed'] = resume_sync(event, context)
         
         # Return success response with statistics
         return {
             'statusCode': 200,
             'body': json.dumps({
-                'message': 'BLS data sync completed successfully',
-                'statistics': stats
+                'message': (
+                    'BLS data sync completed successfully' if stats['status'] == 'complete'
+                    else 'BLS data sync stopped before the timeout; the next invocation resumes it'
+                ),
+                'statistics': stats,
+                'metrics': metrics.summary()
             })
         }
     
     except Exception as e:
-        print(f"Error in lambda_handler: {str(e)}")
+        log.exception(f"Error in lambda_handler: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -265,7 +1232,7 @@ def lambda_handler(event, context):
 if __name__ == "__main__":
     # Ensure bucket name is set
     if not os.environ.get("S3_BUCKET_NAME"):
-        print("WARNING: S3_BUCKET_NAME not set, using default 'rearc-bls-data'")
-        print("INFO: Set via: export S3_BUCKET_NAME=your-bucket-name")
+        log.warning("S3_BUCKET_NAME not set, using default 'rearc-bls-data'")
+        log.info("Set via: export S3_BUCKET_NAME=your-bucket-name")
     
     sync_bls_to_s3()
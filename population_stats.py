@@ -0,0 +1,153 @@
+"""
+Mergeable population statistics
+
+RunningStats is a single-pass accumulator (Welford's update, Chan et al.'s
+merge) for count, mean, variance, min and max. datausa_sync.py stores one
+per year next to population_data.json, and statistics over any year range
+are obtained by merging those partials instead of rescanning the data.
+"""
+
+import gzip
+import json
+import math
+
+# Population statistics describe the whole nation; state/county rows are skipped
+NATION_GEOGRAPHY = 'us'
+
+
+class RunningStats:
+    """Count, mean, sum of squared deviations (m2), min and max of a stream of values"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+
+    def add(self, value):
+        """Fold one value in (Welford)"""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def merge(self, other):
+        """Combine with another accumulator as if both streams had been added here (Chan)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        """Sample standard deviation (n - 1), as Spark's stddev; None below two values"""
+        if self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def summary(self):
+        """The report fields: mean, std, min, max and count"""
+        return {
+            'mean': self.mean if self.count else None,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+            'count': self.count
+        }
+
+    def to_dict(self):
+        """Serializable partial state"""
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a partial written by to_dict()"""
+        return cls(data['count'], data['mean'], data['m2'], data['min'], data['max'])
+
+
+def loads_population_data(content):
+    """
+    Parse population data as stored by datausa_sync.py in any OUTPUT_FORMAT:
+    a JSON document or newline-delimited records, optionally gzip-compressed.
+
+    Returns:
+        Parsed JSON (dict), or a list of records for NDJSON
+    """
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+    text = content.decode('utf-8') if isinstance(content, bytes) else content
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    # A single NDJSON record parses as a plain dict
+    if isinstance(data, dict) and 'data' not in data:
+        return [data]
+    return data
+
+
+def population_records(data):
+    """
+    Yield (year, population) pairs from population JSON.
+    Understands the headers/data layout written by datausa_sync.py
+    (B01001_001E with a 'year' column, or the file's 'vintage') and
+    DataUSA-style record lists with Year/Population keys. Only nation-level
+    rows are used when the data carries a 'geography' column.
+    """
+    records = data.get('data', []) if isinstance(data, dict) else data
+    headers = data.get('headers') if isinstance(data, dict) else None
+    vintage = data.get('vintage') if isinstance(data, dict) else None
+
+    for record in records:
+        if headers:
+            record = dict(zip(headers, record))
+        if record.get('geography', NATION_GEOGRAPHY) != NATION_GEOGRAPHY:
+            continue
+        year = record.get('year', record.get('Year', vintage))
+        population = record.get('B01001_001E', record.get('Population'))
+        try:
+            yield int(year), float(population)
+        except (TypeError, ValueError):
+            continue
+
+
+def build_yearly_stats(data):
+    """Accumulate population JSON into {year: RunningStats} in one pass"""
+    yearly = {}
+    for year, population in population_records(data):
+        yearly.setdefault(year, RunningStats()).add(population)
+    return yearly
+
+
+def range_statistics(yearly, start_year, end_year):
+    """Merge the stored partials for start_year..end_year (inclusive) into one summary"""
+    total = RunningStats()
+    for year, stats in yearly.items():
+        if start_year <= year <= end_year:
+            total.merge(stats)
+    return total.summary()
+
+
+def yearly_stats_to_json(yearly):
+    """{year: RunningStats} -> JSON-ready dict keyed by year string"""
+    return {str(year): stats.to_dict() for year, stats in sorted(yearly.items())}
+
+
+def yearly_stats_from_json(data):
+    """Inverse of yearly_stats_to_json()"""
+    return {int(year): RunningStats.from_dict(stats) for year, stats in data.items()}
@@ -0,0 +1,104 @@
+"""
+Structured logging for the sync Lambdas
+
+Records are written to stdout as one JSON object per line carrying the
+level, the service, the run ID and the Lambda request ID, so CloudWatch
+Logs Insights can filter and aggregate them. LOG_LEVEL (default INFO)
+gates what is written. Per-file events go through EventSummary, which logs
+one INFO line per kind of event at the end of a run; the individual events
+are only written at DEBUG.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+MAX_EXAMPLES = 5  # File names listed with each aggregated event
+
+# Correlation fields of the run in progress, shared by its worker threads
+_context = {}
+
+
+def fields(**values):
+    """Structured fields for one record: log.info("...", extra=fields(key=value))"""
+    return {'fields': values}
+
+
+def set_context(**values):
+    """Add correlation fields (e.g. run_id, request_id) to every following record"""
+    _context.update({name: value for name, value in values.items() if value is not None})
+
+
+def clear_context():
+    _context.clear()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'service': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(_context)
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, so redirected output is captured"""
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+def get_logger(service):
+    """JSON logger for one sync service, configured once per process"""
+    logger = logging.getLogger(service)
+    if not logger.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False  # Lambda's root handler would write it a second time
+    return logger
+
+
+class EventSummary:
+    """
+    Counts per-file events (uploaded, skipped, ...) during a run and logs
+    them as one INFO record per event with a few example names.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.counts = {}
+        self.examples = {}
+        self._lock = threading.Lock()
+
+    def record(self, event, name, **details):
+        with self._lock:
+            self.counts[event] = self.counts.get(event, 0) + 1
+            examples = self.examples.setdefault(event, [])
+            if len(examples) < MAX_EXAMPLES:
+                examples.append(name)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"{event}: {name}", extra=fields(event=event, file=name, **details))
+
+    def log(self):
+        with self._lock:
+            for event, count in sorted(self.counts.items()):
+                self.logger.info(
+                    f"{event}: {count}",
+                    extra=fields(event=event, count=count, examples=self.examples[event])
+                )
@@ -0,0 +1,113 @@
+"""
+Per-run timing and counters for the sync Lambdas
+
+SyncMetrics records how long each phase of a run took, counters such as
+bytes moved and retries, and per-item latencies. At the end of a run it is
+printed once in CloudWatch Embedded Metric Format (EMF), which CloudWatch
+turns into metrics without any API calls, and summarized for the handler's
+response. Phase times are summed over worker threads, so phases that run
+concurrently can add up to more than the run's wall time.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'DataQuest/Sync')
+MAX_EMF_VALUES = 100  # EMF limit on values per metric
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SyncMetrics:
+    """Phase durations, counters and latencies of one sync run; thread-safe"""
+
+    def __init__(self, service):
+        self.service = service
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> [seconds, calls]
+        self.counters = {}
+        self.latencies = {}  # name -> [milliseconds]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as part of phase `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            totals = self.phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, milliseconds):
+        """Record one latency sample, e.g. the time to process one file"""
+        with self._lock:
+            self.latencies.setdefault(name, []).append(milliseconds)
+
+    def summary(self):
+        """JSON-ready breakdown of the run for the handler response"""
+        with self._lock:
+            return {
+                'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+                'phases_ms': {name: round(seconds * 1000, 1) for name, (seconds, _) in sorted(self.phases.items())},
+                'phase_calls': {name: calls for name, (_, calls) in sorted(self.phases.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'latencies_ms': {
+                    name: {
+                        'count': len(values),
+                        'p50': round(percentile(values, 0.5), 1),
+                        'p95': round(percentile(values, 0.95), 1),
+                        'max': round(max(values), 1)
+                    }
+                    for name, values in sorted(self.latencies.items()) if values
+                }
+            }
+
+    def emf(self):
+        """The run as one CloudWatch Embedded Metric Format document"""
+        summary = self.summary()
+        document = {'Service': self.service}
+        definitions = []
+
+        def put(name, value, unit):
+            document[name] = value
+            definitions.append({'Name': name, 'Unit': unit})
+
+        put('total_ms', summary['total_ms'], 'Milliseconds')
+        for name, milliseconds in summary['phases_ms'].items():
+            put(f"{name}_ms", milliseconds, 'Milliseconds')
+        for name, value in summary['counters'].items():
+            put(name, value, 'Bytes' if name.startswith('bytes') else 'Count')
+        with self._lock:
+            for name, values in self.latencies.items():
+                put(f"{name}_ms", [round(value, 1) for value in values[:MAX_EMF_VALUES]], 'Milliseconds')
+
+        document['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['Service']],
+                'Metrics': definitions
+            }]
+        }
+        return document
+
+    def emit(self):
+        """Print the EMF document; Lambda ships stdout to CloudWatch Logs"""
+        print(json.dumps(self.emf()))